@@ -76,7 +76,7 @@ export const TimeSeriesStatsTable: React.FC<TimeSeriesStatsTableProps> = ({
         'Change %',
       ],
       ...data.map((row) => [
-        row.timestamp,
+        new Date(row.timestamp).toISOString(),
         row.price?.toFixed(4) || '',
         row.volume?.toFixed(4) || '',
         row.mean?.toFixed(4) || '',
@@ -5,6 +5,9 @@ import { useEffect, useRef, useState } from 'react';
 
 const WS_URL = import.meta.env.VITE_WS_URL || 'ws://localhost:8010/ws';
 
+// The backend sends UTF-8 JSON in binary frames
+const textDecoder = new TextDecoder();
+
 export interface TickUpdate {
   timestamp: string;
   symbol: string;
@@ -66,6 +69,7 @@ export const useWebSocket = () => {
           }/${maxReconnectAttempts})...`
         );
         const ws = new WebSocket(WS_URL);
+        ws.binaryType = 'arraybuffer';
         wsRef.current = ws;
 
         ws.onopen = () => {
@@ -82,11 +86,21 @@ export const useWebSocket = () => {
           if (!isMounted) return;
 
           try {
-            const message: WebSocketMessage = JSON.parse(event.data);
+            const raw =
+              typeof event.data === 'string'
+                ? event.data
+                : textDecoder.decode(event.data as ArrayBuffer);
+            const message: WebSocketMessage = JSON.parse(raw);
             if (message.type === 'tick_update' && message.data) {
               // Type guard to ensure data is an array of TickUpdate
+              // Updates only carry symbols that ticked, so merge by symbol
               if (Array.isArray(message.data)) {
-                setLatestData(message.data as TickUpdate[]);
+                const ticks = message.data as TickUpdate[];
+                setLatestData((prev) => {
+                  const bySymbol = new Map(prev.map((t) => [t.symbol, t]));
+                  ticks.forEach((tick) => bySymbol.set(tick.symbol, tick));
+                  return Array.from(bySymbol.values());
+                });
               }
             } else if (message.type === 'ping') {
               // Keep connection alive, no action needed
@@ -13,14 +13,14 @@ const api = axios.create({
 });
 
 export interface TickData {
-  timestamp: string;
+  timestamp: number; // epoch milliseconds
   symbol: string;
   price: number;
   quantity: number;
 }
 
 export interface OHLCData {
-  timestamp: string;
+  timestamp: number; // epoch milliseconds
   symbol: string;
   timeframe: string;
   open: number;
@@ -52,14 +52,14 @@ export interface HedgeRatio {
 }
 
 export interface SpreadData {
-  timestamp: string;
+  timestamp: number; // epoch milliseconds
   spread: number;
   close_1: number;
   close_2: number;
 }
 
 export interface ZScoreData {
-  timestamp: string;
+  timestamp: number; // epoch milliseconds
   zscore: number;
   spread: number;
 }
@@ -74,7 +74,7 @@ export interface ADFTestResult {
 }
 
 export interface CorrelationData {
-  timestamp: string;
+  timestamp: number; // epoch milliseconds
   rolling_corr: number;
   close_1: number;
   close_2: number;
@@ -232,7 +232,7 @@ export const apiClient = {
       params: { symbol, timeframe, window },
     });
     return response.data.data as Array<
-      PriceStats & { timestamp: string; price: number; volume: number }
+      PriceStats & { timestamp: number; price: number; volume: number }
     >;
   },
 
@@ -3,72 +3,290 @@ API routes for the trading analytics application
 """
 
 from fastapi import APIRouter, Query, HTTPException, UploadFile, File
-from fastapi.responses import StreamingResponse
-from typing import Optional, Any
+from fastapi.responses import Response, StreamingResponse, ORJSONResponse
+from typing import Optional, Any, Callable, Dict, List, Tuple
+from functools import singledispatch
 from datetime import datetime
+from zoneinfo import ZoneInfo
+from dateutil import tz
 import pandas as pd
 import numpy as np
+import orjson
+import pyarrow as pa
+import pyarrow.csv as pacsv
 import io
-import math
+import os
+import threading
+import time
+from collections import OrderedDict
 
 from services.data_service import DataService
 from services.analytics_service import AnalyticsService
 from services.alert_service import AlertService, Alert
 
 
+_INFINITIES = (float("inf"), float("-inf"))
+
+
+@singledispatch
 def clean_json_value(value: Any) -> Any:
     """Convert NaN, Inf, and -Inf to JSON-compliant values"""
+    # Fallback for types without a registered handler
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    try:
+        # Try to convert to native Python type
+        if hasattr(value, "item"):  # numpy scalar
+            return clean_json_value(value.item())
+        return str(value)
+    except (TypeError, ValueError, AttributeError):
+        return str(value)
+
+
+@clean_json_value.register(type(None))
+@clean_json_value.register(int)  # also covers bool
+@clean_json_value.register(str)
+def _clean_passthrough(value):
+    return value
+
 
-    # Handle None first
-    if value is None:
+@clean_json_value.register(float)
+def _clean_float(value: float):
+    # value != value is the NaN check, without a function call
+    if value != value or value in _INFINITIES:
         return None
+    return value
+
+
+@clean_json_value.register(np.floating)
+def _clean_np_float(value: np.floating):
+    return _clean_float(float(value))
+
+
+@clean_json_value.register(np.integer)
+def _clean_np_int(value: np.integer):
+    return int(value)
+
+
+@clean_json_value.register(np.bool_)
+def _clean_np_bool(value: np.bool_):
+    return bool(value)
 
-    # Handle numpy types first (before checking for iterables)
-    if isinstance(value, np.bool_):
-        return bool(value)
-    elif isinstance(value, (np.integer, np.int64, np.int32, np.int8, np.int16)):
-        return int(value)
-    elif isinstance(value, (np.floating, np.float64, np.float32, np.float16)):
-        if math.isnan(value) or math.isinf(value):
-            return None
-        return float(value)
-    elif isinstance(value, np.ndarray):
-        return [clean_json_value(item) for item in value.tolist()]
-    # Handle Python native types
-    elif isinstance(value, bool):
-        return value
-    elif isinstance(value, float):
-        if math.isnan(value) or math.isinf(value):
-            return None
-        return value
-    elif isinstance(value, (int, str)):
-        return value
-    elif isinstance(value, dict):
-        return {k: clean_json_value(v) for k, v in value.items()}
-    elif isinstance(value, (list, tuple)):
-        return [clean_json_value(item) for item in value]
-    # Handle datetime and other special types
-    elif hasattr(value, "isoformat"):
+
+@clean_json_value.register(np.ndarray)
+def _clean_ndarray(value: np.ndarray):
+    if value.dtype.kind == "f":
+        # Mask non-finite values in one C-level pass instead of per element
+        cleaned = value.astype(object)
+        cleaned[~np.isfinite(value)] = None
+        return cleaned.tolist()
+    if value.dtype.kind in "biu":
+        return value.tolist()
+    # Object/nested arrays may hold anything, so fall back to recursion
+    return [clean_json_value(item) for item in value.tolist()]
+
+
+@clean_json_value.register(dict)
+def _clean_dict(value: dict):
+    return {k: clean_json_value(v) for k, v in value.items()}
+
+
+@clean_json_value.register(list)
+@clean_json_value.register(tuple)
+def _clean_sequence(value):
+    return [clean_json_value(item) for item in value]
+
+
+@clean_json_value.register(datetime)
+def _clean_datetime(value: datetime):
+    return value.isoformat()
+
+
+# NaN/Inf are encoded as null by orjson, numpy scalars/arrays natively
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _orjson_default(value: Any) -> Any:
+    """Encode types orjson does not support natively (e.g. pandas Timestamp)"""
+    if hasattr(value, "isoformat"):
         return value.isoformat()
-    # Handle other types - convert to string as last resort
-    else:
+    raise TypeError
+
+
+class NumpyJSONResponse(ORJSONResponse):
+    """ORJSONResponse that also serializes pandas/numpy values"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_orjson_default, option=ORJSON_OPTIONS)
+
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+
+def arrow_response(df: pd.DataFrame) -> Response:
+    """Serialize a DataFrame as an Arrow IPC stream (columnar, binary), with
+    the timestamp column as UTC timestamps"""
+    if "timestamp" in df.columns:
+        df = df.assign(timestamp=utc_timestamps(df["timestamp"]))
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return Response(content=sink.getvalue().to_pybytes(), media_type=ARROW_STREAM_MEDIA_TYPE)
+
+
+def df_records(df: pd.DataFrame) -> list:
+    """Build row records from column tuples, skipping pandas' to_dict path"""
+    columns = df.columns.tolist()
+    return [dict(zip(columns, row)) for row in df.itertuples(index=False, name=None)]
+
+
+def _local_timezone():
+    """The server's local time zone, which stored timestamps are in
+
+    An IANA name (from TZ or the /etc/localtime link) lets pandas localize
+    with its fast zone database path; dateutil's tzlocal is the fallback.
+    """
+    name = os.environ.get("TZ", "").lstrip(":")
+    if not name:
+        path = os.path.realpath("/etc/localtime")
+        if "zoneinfo/" in path:
+            name = path.split("zoneinfo/", 1)[1]
+    if name:
         try:
-            # Try to convert to native Python type
-            if hasattr(value, "item"):  # numpy scalar
-                return clean_json_value(value.item())
-            return str(value)
-        except (TypeError, ValueError, AttributeError):
-            return str(value)
+            ZoneInfo(name)
+            return name
+        except Exception:
+            pass
+    return tz.tzlocal()
+
+
+LOCAL_TIMEZONE = _local_timezone()
+
+
+def utc_timestamps(timestamps: pd.Series) -> pd.Series:
+    """Convert naive local timestamps to UTC using the zone's historical
+    offsets
+
+    Wall times repeated when DST ends are inferred from the order of the
+    series where possible, otherwise read as standard time, so every value
+    gets a timestamp.
+    """
+    local = pd.to_datetime(timestamps)
+    try:
+        utc = local.dt.tz_localize(
+            LOCAL_TIMEZONE, ambiguous="infer", nonexistent="shift_forward"
+        )
+    except Exception:
+        utc = local.dt.tz_localize(
+            LOCAL_TIMEZONE,
+            ambiguous=np.zeros(len(local), dtype=bool),
+            nonexistent="shift_forward",
+        )
+    return utc.dt.tz_convert("UTC")
+
+
+def epoch_millis(df: pd.DataFrame) -> pd.DataFrame:
+    """Replace the timestamp column with integer epoch milliseconds"""
+    utc = utc_timestamps(df["timestamp"])
+    df["timestamp"] = utc.dt.as_unit("ms").astype("int64")
+    return df
+
+
+def sanitize_df(df: pd.DataFrame) -> pd.DataFrame:
+    """Replace NaN/Inf in float columns with None using one vectorized pass"""
+    numeric = df.select_dtypes(include=[np.floating])
+    if numeric.empty:
+        return df
+
+    mask = ~np.isfinite(numeric.to_numpy())
+    if not mask.any():
+        return df
+
+    return df.assign(
+        **{
+            col: numeric[col].astype(object).where(~mask[:, i], None)
+            for i, col in enumerate(numeric.columns)
+        }
+    )
+
+
+CSV_CHUNK_ROWS = 10_000
 
 
+def iter_csv(df: pd.DataFrame):
+    """Yield a DataFrame as CSV text, one chunk of rows at a time"""
+    yield df.iloc[:0].to_csv(index=False)
+    for start in range(0, len(df), CSV_CHUNK_ROWS):
+        chunk = sanitize_df(df.iloc[start : start + CSV_CHUNK_ROWS])
+        yield chunk.to_csv(index=False, header=False)
+
+
+# Endpoints that hit the database or run analytics are plain `def`, so
+# FastAPI runs them in its threadpool instead of blocking the event loop
+# (and with it the /ws stream)
 router = APIRouter()
 
+# Default Binance symbols, encoded once since the response never changes
+_SYMBOLS_BYTES = orjson.dumps(
+    {
+        "symbols": [
+            "BTCUSDT",
+            "ETHUSDT",
+            "BNBUSDT",
+            "ADAUSDT",
+            "SOLUSDT",
+            "XRPUSDT",
+            "DOTUSDT",
+            "DOGEUSDT",
+            "AVAXUSDT",
+            "LINKUSDT",
+        ]
+    }
+)
+
 # These will be injected
 data_service: Optional[DataService] = None
 analytics_service: Optional[AnalyticsService] = None
 alert_service: Optional[AlertService] = None
 
 
+# Analytics results are reused across requests for at most this many seconds,
+# and only while no new tick has arrived for the symbols involved
+ANALYTICS_CACHE_TTL = 5.0
+
+# Maximum number of analytics results kept (least recently used are evicted)
+ANALYTICS_CACHE_SIZE = 128
+
+# key -> (computed_at, symbol generations, result)
+_analytics_cache: "OrderedDict[tuple, Tuple[float, tuple, Any]]" = OrderedDict()
+_analytics_lock = threading.Lock()
+
+
+def cached_analytics(key: tuple, symbols: List[str], compute: Callable[[], Any]) -> Any:
+    """Return compute() for key, reusing a recent result if the data is unchanged"""
+    generations = tuple(data_service.get_generation(s) for s in symbols)
+    now = time.monotonic()
+
+    with _analytics_lock:
+        hit = _analytics_cache.get(key)
+        if hit is not None:
+            computed_at, cached_generations, result = hit
+            if cached_generations == generations and now - computed_at < ANALYTICS_CACHE_TTL:
+                _analytics_cache.move_to_end(key)
+                return result
+            # Stale: drop it rather than keep it around until overwritten
+            del _analytics_cache[key]
+
+    result = compute()
+    with _analytics_lock:
+        _analytics_cache[key] = (now, generations, result)
+        _analytics_cache.move_to_end(key)
+        while len(_analytics_cache) > ANALYTICS_CACHE_SIZE:
+            _analytics_cache.popitem(last=False)
+    return result
+
+
 def set_services(ds: DataService, as_: AnalyticsService, als: AlertService):
     """Set service instances"""
     global data_service, analytics_service, alert_service
@@ -80,25 +298,11 @@ def set_services(ds: DataService, as_: AnalyticsService, als: AlertService):
 @router.get("/symbols")
 async def get_symbols():
     """Get available symbols"""
-    # Default Binance symbols
-    return {
-        "symbols": [
-            "BTCUSDT",
-            "ETHUSDT",
-            "BNBUSDT",
-            "ADAUSDT",
-            "SOLUSDT",
-            "XRPUSDT",
-            "DOTUSDT",
-            "DOGEUSDT",
-            "AVAXUSDT",
-            "LINKUSDT",
-        ]
-    }
+    return Response(content=_SYMBOLS_BYTES, media_type="application/json")
 
 
 @router.post("/debug/test-store")
-async def test_store():
+def test_store():
     """Test endpoint to manually store a tick (for debugging)"""
     if not data_service:
         return {"error": "Data service not initialized"}
@@ -122,13 +326,14 @@ async def test_store():
 
 
 @router.get("/debug/data-status")
-async def get_data_status():
+def get_data_status():
     """Debug endpoint to check data status"""
     if not data_service:
         return {"error": "Data service not initialized"}
 
     from database.database import SessionLocal, DATABASE_URL
     from database.models import TickData
+    from sqlalchemy import and_, func
     import os
 
     db = SessionLocal()
@@ -152,22 +357,48 @@ async def get_data_status():
             "symbols": {},
         }
 
-        for symbol in symbols:
-            count = db.query(TickData).filter(TickData.symbol == symbol).count()
-            latest = (
-                db.query(TickData)
-                .filter(TickData.symbol == symbol)
-                .order_by(TickData.timestamp.desc())
-                .first()
+        # Count + latest tick per symbol in one grouped query, joined back
+        # to the tick table for the price at the latest timestamp
+        latest = (
+            db.query(
+                TickData.symbol.label("symbol"),
+                func.count(TickData.id).label("tick_count"),
+                func.max(TickData.timestamp).label("latest_timestamp"),
+            )
+            .filter(TickData.symbol.in_(symbols))
+            .group_by(TickData.symbol)
+            .subquery()
+        )
+        rows = (
+            db.query(
+                latest.c.symbol,
+                latest.c.tick_count,
+                latest.c.latest_timestamp,
+                TickData.price,
+            )
+            .outerjoin(
+                TickData,
+                and_(
+                    TickData.symbol == latest.c.symbol,
+                    TickData.timestamp == latest.c.latest_timestamp,
+                ),
             )
+            .all()
+        )
+        found = {row.symbol: row for row in rows}
+
+        for symbol in symbols:
+            row = found.get(symbol)
             status["symbols"][symbol] = {
-                "tick_count": count,
-                "latest_timestamp": latest.timestamp.isoformat() if latest else None,
-                "latest_price": latest.price if latest else None,
+                "tick_count": row.tick_count if row else 0,
+                "latest_timestamp": (
+                    row.latest_timestamp.isoformat() if row else None
+                ),
+                "latest_price": row.price if row else None,
             }
 
         # Get total count
-        total_ticks = db.query(TickData).count()
+        total_ticks = db.query(func.count(TickData.id)).scalar()
         status["total_ticks"] = total_ticks
 
         return status
@@ -177,14 +408,14 @@ async def get_data_status():
         db.close()
 
 
-@router.get("/data/ticks")
-async def get_ticks(
+@router.get("/data/ticks", response_model=None)
+def get_ticks(
     symbol: str = Query(..., description="Trading symbol"),
     start_time: Optional[str] = Query(None, description="Start time (ISO format)"),
     end_time: Optional[str] = Query(None, description="End time (ISO format)"),
     limit: int = Query(1000, description="Maximum number of records"),
 ):
-    """Get tick data"""
+    """Get tick data (timestamps as epoch milliseconds)"""
     if not data_service:
         raise HTTPException(status_code=500, detail="Data service not initialized")
 
@@ -194,59 +425,93 @@ async def get_ticks(
     df = data_service.get_ticks(symbol, start, end, limit)
 
     if df.empty:
-        return {"data": []}
-
-    df["timestamp"] = df["timestamp"].apply(
-        lambda x: x.isoformat() if hasattr(x, "isoformat") else str(x)
-    )
+        return NumpyJSONResponse({"data": []})
 
-    return {"data": df.to_dict("records")}
+    return NumpyJSONResponse({"data": df_records(epoch_millis(df))})
 
 
-@router.get("/data/ohlc")
-async def get_ohlc(
+@router.get("/data/ohlc", response_model=None)
+def get_ohlc(
     symbol: str = Query(..., description="Trading symbol"),
     timeframe: str = Query("1m", description="Timeframe: 1s, 1m, 5m"),
     start_time: Optional[str] = Query(None, description="Start time (ISO format)"),
     end_time: Optional[str] = Query(None, description="End time (ISO format)"),
 ):
-    """Get OHLC data"""
+    """Get OHLC data (timestamps as epoch milliseconds)"""
     if not data_service:
         raise HTTPException(status_code=500, detail="Data service not initialized")
 
     start = datetime.fromisoformat(start_time) if start_time else None
     end = datetime.fromisoformat(end_time) if end_time else None
 
-    # First check if we have any tick data
-    tick_count = len(data_service.get_ticks(symbol, start, end, limit=1))
-    if tick_count == 0:
-        print(f"No tick data found for {symbol}. WebSocket may not be receiving data.")
-        return {
-            "data": [],
-            "message": "No data available yet. Waiting for WebSocket data...",
-        }
-
     if timeframe in ["1s", "1m", "5m"]:
         df = data_service.resample_data(symbol, timeframe, start, end)
     else:
         df = data_service.get_ohlc(symbol, timeframe, start, end)
 
+    # Only probe for raw ticks when there is nothing to return
+    if df.empty and not data_service.has_ticks(symbol):
+        print(f"No tick data found for {symbol}. WebSocket may not be receiving data.")
+        return NumpyJSONResponse(
+            {
+                "data": [],
+                "message": "No data available yet. Waiting for WebSocket data...",
+            }
+        )
+
     if df.empty:
         print(f"Resampled data is empty for {symbol} with timeframe {timeframe}")
-        return {
-            "data": [],
-            "message": "Insufficient data for resampling. Need more tick data.",
-        }
+        return NumpyJSONResponse(
+            {
+                "data": [],
+                "message": "Insufficient data for resampling. Need more tick data.",
+            }
+        )
 
-    df["timestamp"] = df["timestamp"].apply(
-        lambda x: x.isoformat() if hasattr(x, "isoformat") else str(x)
-    )
+    return NumpyJSONResponse({"data": df_records(epoch_millis(df))})
+
+
+@router.get("/data/ticks.arrow")
+def get_ticks_arrow(
+    symbol: str = Query(..., description="Trading symbol"),
+    start_time: Optional[str] = Query(None, description="Start time (ISO format)"),
+    end_time: Optional[str] = Query(None, description="End time (ISO format)"),
+    limit: int = Query(1000, description="Maximum number of records"),
+):
+    """Get tick data as an Arrow IPC stream (timestamps in UTC)"""
+    if not data_service:
+        raise HTTPException(status_code=500, detail="Data service not initialized")
 
-    return {"data": df.to_dict("records")}
+    start = datetime.fromisoformat(start_time) if start_time else None
+    end = datetime.fromisoformat(end_time) if end_time else None
+
+    return arrow_response(data_service.get_ticks(symbol, start, end, limit))
+
+
+@router.get("/data/ohlc.arrow")
+def get_ohlc_arrow(
+    symbol: str = Query(..., description="Trading symbol"),
+    timeframe: str = Query("1m", description="Timeframe: 1s, 1m, 5m"),
+    start_time: Optional[str] = Query(None, description="Start time (ISO format)"),
+    end_time: Optional[str] = Query(None, description="End time (ISO format)"),
+):
+    """Get OHLC data as an Arrow IPC stream (timestamps in UTC)"""
+    if not data_service:
+        raise HTTPException(status_code=500, detail="Data service not initialized")
+
+    start = datetime.fromisoformat(start_time) if start_time else None
+    end = datetime.fromisoformat(end_time) if end_time else None
+
+    if timeframe in ["1s", "1m", "5m"]:
+        df = data_service.resample_data(symbol, timeframe, start, end)
+    else:
+        df = data_service.get_ohlc(symbol, timeframe, start, end)
+
+    return arrow_response(df)
 
 
 @router.get("/analytics/price-stats")
-async def get_price_stats(
+def get_price_stats(
     symbol: str = Query(..., description="Trading symbol"),
     timeframe: str = Query("1m", description="Timeframe"),
 ):
@@ -254,18 +519,21 @@ async def get_price_stats(
     if not analytics_service or not data_service:
         raise HTTPException(status_code=500, detail="Services not initialized")
 
-    df = data_service.resample_data(symbol, timeframe)
+    def compute():
+        df = data_service.resample_data(symbol, timeframe)
 
-    if df.empty:
-        return {}
+        if df.empty:
+            return {}
+
+        stats = analytics_service.compute_price_stats(df)
+        # Clean NaN/Inf values before returning
+        return clean_json_value(stats)
 
-    stats = analytics_service.compute_price_stats(df)
-    # Clean NaN/Inf values before returning
-    return clean_json_value(stats)
+    return cached_analytics(("price-stats", symbol, timeframe), [symbol], compute)
 
 
 @router.get("/analytics/hedge-ratio")
-async def get_hedge_ratio(
+def get_hedge_ratio(
     symbol1: str = Query(..., description="First symbol"),
     symbol2: str = Query(..., description="Second symbol"),
     timeframe: str = Query("1m", description="Timeframe"),
@@ -276,67 +544,82 @@ async def get_hedge_ratio(
     if not analytics_service:
         raise HTTPException(status_code=500, detail="Analytics service not initialized")
 
-    if method == "ols":
-        result = analytics_service.compute_ols_hedge_ratio(
-            symbol1, symbol2, timeframe, window
-        )
-    elif method == "kalman":
-        result = analytics_service.compute_kalman_hedge_ratio(
-            symbol1, symbol2, timeframe, window
-        )
-    elif method in ["huber", "theilsen"]:
-        result = analytics_service.compute_robust_regression(
-            symbol1, symbol2, timeframe, method, window
-        )
-    else:
+    if method not in ["ols", "kalman", "huber", "theilsen"]:
         raise HTTPException(status_code=400, detail="Invalid method")
 
-    # Clean NaN/Inf values
-    return clean_json_value(result)
+    def compute():
+        if method == "ols":
+            result = analytics_service.compute_ols_hedge_ratio(
+                symbol1, symbol2, timeframe, window
+            )
+        elif method == "kalman":
+            result = analytics_service.compute_kalman_hedge_ratio(
+                symbol1, symbol2, timeframe, window
+            )
+        else:
+            result = analytics_service.compute_robust_regression(
+                symbol1, symbol2, timeframe, method, window
+            )
+
+        # Clean NaN/Inf values
+        return clean_json_value(result)
+
+    return cached_analytics(
+        ("hedge-ratio", symbol1, symbol2, timeframe, method, window),
+        [symbol1, symbol2],
+        compute,
+    )
 
 
-@router.get("/analytics/spread")
-async def get_spread(
+@router.get("/analytics/spread", response_model=None)
+def get_spread(
     symbol1: str = Query(..., description="First symbol"),
     symbol2: str = Query(..., description="Second symbol"),
     timeframe: str = Query("1m", description="Timeframe"),
     hedge_ratio: Optional[float] = Query(None, description="Hedge ratio (optional)"),
 ):
-    """Get spread data"""
+    """Get spread data (timestamps as epoch milliseconds)"""
     if not analytics_service:
         raise HTTPException(status_code=500, detail="Analytics service not initialized")
 
     df = analytics_service.compute_spread(symbol1, symbol2, timeframe, hedge_ratio)
 
     if df.empty:
-        return {"data": []}
+        return NumpyJSONResponse({"data": []})
 
-    df["timestamp"] = df["timestamp"].apply(
-        lambda x: x.isoformat() if hasattr(x, "isoformat") else str(x)
-    )
+    return NumpyJSONResponse({"data": df_records(epoch_millis(df))})
 
-    # Clean NaN/Inf values
-    records = df.to_dict("records")
-    cleaned_records = [clean_json_value(record) for record in records]
 
-    return {"data": cleaned_records}
+@router.get("/analytics/spread.arrow")
+def get_spread_arrow(
+    symbol1: str = Query(..., description="First symbol"),
+    symbol2: str = Query(..., description="Second symbol"),
+    timeframe: str = Query("1m", description="Timeframe"),
+    hedge_ratio: Optional[float] = Query(None, description="Hedge ratio (optional)"),
+):
+    """Get spread data as an Arrow IPC stream (timestamps in UTC)"""
+    if not analytics_service:
+        raise HTTPException(status_code=500, detail="Analytics service not initialized")
+
+    df = analytics_service.compute_spread(symbol1, symbol2, timeframe, hedge_ratio)
+    return arrow_response(df)
 
 
-@router.get("/analytics/zscore")
-async def get_zscore(
+@router.get("/analytics/zscore", response_model=None)
+def get_zscore(
     symbol1: str = Query(..., description="First symbol"),
     symbol2: str = Query(..., description="Second symbol"),
     timeframe: str = Query("1m", description="Timeframe"),
-    window: int = Query(20, description="Z-score window"),
+    window: int = Query(20, ge=1, description="Z-score window"),
 ):
-    """Get z-score data"""
+    """Get z-score data (timestamps as epoch milliseconds)"""
     if not analytics_service:
         raise HTTPException(status_code=500, detail="Analytics service not initialized")
 
     spread_df = analytics_service.compute_spread(symbol1, symbol2, timeframe)
 
     if spread_df.empty or "spread" not in spread_df.columns:
-        return {"data": []}
+        return NumpyJSONResponse({"data": []})
 
     zscore = analytics_service.compute_zscore(spread_df["spread"], window)
 
@@ -349,19 +632,12 @@ async def get_zscore(
     )
 
     result = result.dropna()
-    result["timestamp"] = result["timestamp"].apply(
-        lambda x: x.isoformat() if hasattr(x, "isoformat") else str(x)
-    )
-
-    # Clean NaN/Inf values
-    records = result.to_dict("records")
-    cleaned_records = [clean_json_value(record) for record in records]
 
-    return {"data": cleaned_records}
+    return NumpyJSONResponse({"data": df_records(epoch_millis(result))})
 
 
 @router.get("/analytics/adf-test")
-async def get_adf_test(
+def get_adf_test(
     symbol1: str = Query(..., description="First symbol"),
     symbol2: str = Query(..., description="Second symbol"),
     timeframe: str = Query("1m", description="Timeframe"),
@@ -370,47 +646,54 @@ async def get_adf_test(
     if not analytics_service:
         raise HTTPException(status_code=500, detail="Analytics service not initialized")
 
-    spread_df = analytics_service.compute_spread(symbol1, symbol2, timeframe)
+    def compute():
+        spread_df = analytics_service.compute_spread(symbol1, symbol2, timeframe)
 
-    if spread_df.empty or "spread" not in spread_df.columns:
-        return {}
+        if spread_df.empty or "spread" not in spread_df.columns:
+            return {}
 
-    result = analytics_service.compute_adf_test(spread_df["spread"])
-    # Clean NaN/Inf values
-    return clean_json_value(result)
+        result = analytics_service.compute_adf_test(spread_df["spread"])
+        # Clean NaN/Inf values
+        return clean_json_value(result)
+
+    return cached_analytics(
+        ("adf-test", symbol1, symbol2, timeframe), [symbol1, symbol2], compute
+    )
 
 
 @router.get("/analytics/correlation")
-async def get_correlation(
+def get_correlation(
     symbol1: str = Query(..., description="First symbol"),
     symbol2: str = Query(..., description="Second symbol"),
     timeframe: str = Query("1m", description="Timeframe"),
-    window: int = Query(20, description="Rolling window"),
+    window: int = Query(20, ge=1, description="Rolling window"),
 ):
-    """Get rolling correlation"""
+    """Get rolling correlation (timestamps as epoch milliseconds)"""
     if not analytics_service:
         raise HTTPException(status_code=500, detail="Analytics service not initialized")
 
-    df = analytics_service.compute_rolling_correlation(
-        symbol1, symbol2, timeframe, window
-    )
-
-    if df.empty:
-        return {"data": []}
+    def compute():
+        df = analytics_service.compute_rolling_correlation(
+            symbol1, symbol2, timeframe, window
+        )
 
-    df["timestamp"] = df["timestamp"].apply(
-        lambda x: x.isoformat() if hasattr(x, "isoformat") else str(x)
-    )
+        if df.empty:
+            return {"data": []}
 
-    # Clean NaN/Inf values before converting to dict
-    records = df.to_dict("records")
-    cleaned_records = [clean_json_value(record) for record in records]
+        # NaN rolling values (warm-up period) are encoded as null
+        return {"data": df_records(epoch_millis(df))}
 
-    return {"data": cleaned_records}
+    return NumpyJSONResponse(
+        cached_analytics(
+            ("correlation", symbol1, symbol2, timeframe, window),
+            [symbol1, symbol2],
+            compute,
+        )
+    )
 
 
 @router.get("/analytics/correlation-matrix")
-async def get_correlation_matrix(
+def get_correlation_matrix(
     symbols: str = Query(..., description="Comma-separated symbols"),
     timeframe: str = Query("1m", description="Timeframe"),
     window: int = Query(100, description="Window size"),
@@ -420,28 +703,38 @@ async def get_correlation_matrix(
         raise HTTPException(status_code=500, detail="Analytics service not initialized")
 
     symbol_list = [s.strip() for s in symbols.split(",")]
-    corr_matrix = analytics_service.compute_cross_correlation_matrix(
-        symbol_list, timeframe, window
-    )
 
-    if corr_matrix.empty:
-        return {"data": {}}
+    def compute():
+        corr_matrix = analytics_service.compute_cross_correlation_matrix(
+            symbol_list, timeframe, window
+        )
 
-    # Clean NaN/Inf values
-    matrix_dict = corr_matrix.to_dict()
-    return {"data": clean_json_value(matrix_dict)}
+        if corr_matrix.empty:
+            return {"data": {}}
+
+        # Clean NaN/Inf values
+        return {"data": sanitize_df(corr_matrix).to_dict()}
+
+    return NumpyJSONResponse(
+        cached_analytics(
+            ("correlation-matrix", tuple(symbol_list), timeframe, window),
+            symbol_list,
+            compute,
+        )
+    )
 
 
 @router.get("/analytics/backtest")
-async def get_backtest(
+def get_backtest(
     symbol1: str = Query(..., description="First symbol"),
     symbol2: str = Query(..., description="Second symbol"),
     timeframe: str = Query("1m", description="Timeframe"),
     entry_z: float = Query(2.0, description="Entry z-score threshold"),
     exit_z: float = Query(0.0, description="Exit z-score threshold"),
-    window: int = Query(20, description="Z-score window"),
+    window: int = Query(20, ge=1, description="Z-score window"),
 ):
-    """Get mean-reversion backtest results"""
+    """Get mean-reversion backtest results (trade timestamps as epoch
+    milliseconds)"""
     if not analytics_service:
         raise HTTPException(status_code=500, detail="Analytics service not initialized")
 
@@ -449,18 +742,21 @@ async def get_backtest(
         symbol1, symbol2, timeframe, entry_z, exit_z, window
     )
 
-    # Convert positions timestamps
-    if "positions" in result:
-        for pos in result["positions"]:
-            if "timestamp" in pos and hasattr(pos["timestamp"], "isoformat"):
-                pos["timestamp"] = pos["timestamp"].isoformat()
+    positions = result.get("positions")
+    if positions:
+        millis = epoch_millis(
+            pd.DataFrame({"timestamp": [p["timestamp"] for p in positions]})
+        )["timestamp"].tolist()
+        for position, ts in zip(positions, millis):
+            position["timestamp"] = ts
 
-    # Clean NaN/Inf values
-    return clean_json_value(result)
+    # Otherwise the backtest only yields floats and numpy scalars, which the
+    # orjson response encodes directly (NaN/Inf as null)
+    return NumpyJSONResponse(result)
 
 
 @router.get("/analytics/liquidity")
-async def get_liquidity(
+def get_liquidity(
     symbol: str = Query(..., description="Trading symbol"),
     timeframe: str = Query("1m", description="Timeframe"),
 ):
@@ -474,12 +770,13 @@ async def get_liquidity(
 
 
 @router.get("/analytics/time-series-stats")
-async def get_time_series_stats(
+def get_time_series_stats(
     symbol: str = Query(..., description="Trading symbol"),
     timeframe: str = Query("1m", description="Timeframe"),
     window: int = Query(60, description="Number of periods"),
 ):
-    """Get time-series statistics for each period"""
+    """Get time-series statistics for each period (timestamps as epoch
+    milliseconds)"""
     if not data_service or not analytics_service:
         raise HTTPException(status_code=500, detail="Services not initialized")
 
@@ -490,24 +787,13 @@ async def get_time_series_stats(
 
     df = df.tail(window)
 
-    # Compute stats for each row
-    results = []
-    for i in range(len(df)):
-        window_df = df.iloc[max(0, i - 20) : i + 1]  # Rolling 20-period window
-        if len(window_df) > 0:
-            stats = analytics_service.compute_price_stats(window_df)
-            stats["timestamp"] = (
-                df.iloc[i]["timestamp"].isoformat()
-                if hasattr(df.iloc[i]["timestamp"], "isoformat")
-                else str(df.iloc[i]["timestamp"])
-            )
-            stats["price"] = float(df.iloc[i]["close"])
-            stats["volume"] = float(df.iloc[i].get("volume", 0))
-            # Clean NaN/Inf values before returning
-            stats = clean_json_value(stats)
-            results.append(stats)
+    # Rolling 20-period stats for every row in one pass
+    stats = analytics_service.compute_price_stats_rolling(df, window=20)
+    stats["timestamp"] = df["timestamp"]
+    stats["price"] = df["close"]
+    stats["volume"] = df["volume"] if "volume" in df.columns else 0.0
 
-    return {"data": results}
+    return NumpyJSONResponse({"data": df_records(epoch_millis(stats))})
 
 
 @router.get("/alerts")
@@ -551,7 +837,7 @@ async def delete_alert(alert_id: str):
 
 
 @router.get("/export/csv")
-async def export_csv(
+def export_csv(
     symbol: str = Query(..., description="Trading symbol"),
     timeframe: str = Query("1m", description="Timeframe"),
     start_time: Optional[str] = Query(None, description="Start time (ISO format)"),
@@ -572,12 +858,9 @@ async def export_csv(
     if df.empty:
         raise HTTPException(status_code=404, detail="No data found")
 
-    # Convert to CSV
-    stream = io.StringIO()
-    df.to_csv(stream, index=False)
-
+    # Stream CSV in row chunks (non-finite values become empty cells)
     return StreamingResponse(
-        iter([stream.getvalue()]),
+        iter_csv(df),
         media_type="text/csv",
         headers={
             "Content-Disposition": f"attachment; filename={symbol}_{timeframe}.csv"
@@ -593,7 +876,12 @@ async def upload_ohlc(file: UploadFile = File(...)):
 
     try:
         contents = await file.read()
-        df = pd.read_csv(io.BytesIO(contents))
+        # pyarrow's multithreaded CSV reader, converted to pandas once
+        table = pacsv.read_csv(
+            io.BytesIO(contents),
+            read_options=pacsv.ReadOptions(use_threads=True),
+        )
+        df = table.to_pandas()
 
         # Validate columns
         required_cols = ["timestamp", "open", "high", "low", "close"]
@@ -18,7 +18,9 @@ class TickData(Base):
     created_at = Column(DateTime, default=func.now())
     
     __table_args__ = (
-        Index('idx_symbol_timestamp', 'symbol', 'timestamp'),
+        # Covers the "latest price per symbol" lookup as an index-only scan;
+        # SQLite walks it backwards for ORDER BY timestamp DESC
+        Index('idx_symbol_ts_price', 'symbol', 'timestamp', 'price'),
     )
 
 
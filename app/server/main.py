@@ -5,9 +5,11 @@ Main FastAPI application for real-time trading analytics
 import os
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
+import orjson
 import uvicorn
 from contextlib import asynccontextmanager
 
@@ -15,7 +17,7 @@ from services.websocket_service import WebSocketService
 from services.data_service import DataService
 from services.analytics_service import AnalyticsService
 from services.alert_service import AlertService
-from api.routes import router, set_services
+from api.routes import router, set_services, NumpyJSONResponse
 from database.database import init_db
 
 # Global services
@@ -56,6 +58,7 @@ async def lifespan(app: FastAPI):
 
     # Cleanup on shutdown
     await websocket_service.stop()
+    alert_service.flush()
 
 
 app = FastAPI(
@@ -63,6 +66,7 @@ app = FastAPI(
     description="Real-time trading data analytics and visualization",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=NumpyJSONResponse,
 )
 
 # Allowed origins for CORS
@@ -82,6 +86,9 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
+# Compress large JSON/CSV payloads (repeated floats compress well)
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 
 def get_cors_headers(request: Request):
     """Get CORS headers based on request origin"""
@@ -140,6 +147,17 @@ async def root():
     return {"message": "Trading Analytics API", "status": "running"}
 
 
+# Seconds without ticks before a keep-alive ping is sent to /ws clients
+WS_PING_INTERVAL = 5.0
+
+
+async def send_ws_message(websocket: WebSocket, message: dict):
+    """Send a message as an orjson-encoded binary frame"""
+    await websocket.send_bytes(
+        orjson.dumps(message, option=orjson.OPT_SERIALIZE_NUMPY)
+    )
+
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     """WebSocket endpoint for real-time data streaming to frontend"""
@@ -150,26 +168,49 @@ async def websocket_endpoint(websocket: WebSocket):
 
     global websocket_service
 
+    # Ticks are pushed into this queue by the ingestion service
+    queue = websocket_service.register_client() if websocket_service else None
+
     try:
+        if websocket_service:
+            # Start the client off with the current snapshot
+            data = await websocket_service.get_latest_data_bytes()
+            if data:
+                await websocket.send_bytes(data)
+
         while True:
             try:
                 # Check if connection is still open
                 # FastAPI WebSocket doesn't expose a direct state check,
                 # so we catch the exception when trying to send
 
-                # Send real-time updates
-                if websocket_service:
-                    data = await websocket_service.get_latest_data()
-                    if data:
-                        await websocket.send_json(data)
-                    else:
-                        # Send ping to keep connection alive
-                        await websocket.send_json({"type": "ping", "data": []})
-                else:
+                if queue is None:
                     # Send empty update to keep connection alive
-                    await websocket.send_json({"type": "ping", "data": []})
-
-                await asyncio.sleep(0.5)  # Update every 500ms
+                    await send_ws_message(websocket, {"type": "ping", "data": []})
+                    await asyncio.sleep(WS_PING_INTERVAL)
+                    continue
+
+                try:
+                    tick = await asyncio.wait_for(queue.get(), timeout=WS_PING_INTERVAL)
+                except asyncio.TimeoutError:
+                    # No ticks for a while - send ping to keep connection alive
+                    await send_ws_message(websocket, {"type": "ping", "data": []})
+                    continue
+
+                # Coalesce everything queued since the last send into one
+                # frame, keeping only the latest tick per symbol
+                latest = {tick.symbol: tick}
+                while not queue.empty():
+                    tick = queue.get_nowait()
+                    latest[tick.symbol] = tick
+
+                await send_ws_message(
+                    websocket,
+                    {
+                        "type": "tick_update",
+                        "data": [t._asdict() for t in latest.values()],
+                    },
+                )
 
             except WebSocketDisconnect:
                 print("WebSocket client disconnected normally")
@@ -202,6 +243,8 @@ async def websocket_endpoint(websocket: WebSocket):
     except Exception as e:
         print(f"WebSocket error: {e}")
     finally:
+        if queue is not None:
+            websocket_service.unregister_client(queue)
         print("WebSocket endpoint cleaned up")
 
 
@@ -1,10 +1,27 @@
 """
 Alert service for managing and checking trading alerts
 """
+from datetime import datetime
 from typing import Dict, List, Optional
 from services.analytics_service import AnalyticsService
-import json
+import asyncio
+import numpy as np
+import pandas as pd
+import orjson
 import os
+import threading
+
+# Seconds to wait before writing alerts.json after a change
+SAVE_DEBOUNCE_SECONDS = 0.5
+
+# Integer codes for the supported alert conditions
+PRICE_ABOVE, PRICE_BELOW, SPREAD_ABOVE, ZSCORE_ABOVE = range(4)
+CONDITION_CODES = {
+    'price >': PRICE_ABOVE,
+    'price <': PRICE_BELOW,
+    'spread >': SPREAD_ABOVE,
+    'zscore >': ZSCORE_ABOVE,
+}
 
 
 class Alert:
@@ -27,19 +44,47 @@ class AlertService:
         self.analytics_service = analytics_service
         self.alerts: Dict[str, Alert] = {}
         self.alert_file = "alerts.json"
+        self._save_timer: Optional[threading.Timer] = None
+        self._save_lock = threading.Lock()
+        # symbol -> (enabled alerts, thresholds, condition codes), rebuilt
+        # lazily after alerts are added or removed
+        self._symbol_alerts: Dict[str, tuple] = {}
+        # Symbols with an enabled spread or z-score alert; replaced, never
+        # mutated, so the ingestion loop can read it without a lock
+        self._analytics_symbols: frozenset = frozenset()
+        # (enabled price alerts, thresholds, is-below mask, symbol index cache)
+        self._price_alerts: Optional[tuple] = None
         self.load_alerts()
     
     def add_alert(self, alert: Alert):
         """Add an alert"""
+        previous = self.alerts.get(alert.id)
+        if previous is not None:
+            self._symbol_alerts.pop(previous.symbol, None)
         self.alerts[alert.id] = alert
+        self._symbol_alerts.pop(alert.symbol, None)
+        self._refresh_alert_lookups()
         self.save_alerts()
     
     def remove_alert(self, alert_id: str):
         """Remove an alert"""
         if alert_id in self.alerts:
-            del self.alerts[alert_id]
+            alert = self.alerts.pop(alert_id)
+            self._symbol_alerts.pop(alert.symbol, None)
+            self._refresh_alert_lookups()
             self.save_alerts()
     
+    def get_analytics_symbols(self) -> frozenset:
+        """Get the symbols that have an enabled spread or z-score alert"""
+        return self._analytics_symbols
+    
+    def _refresh_alert_lookups(self):
+        self._analytics_symbols = frozenset(
+            a.symbol for a in list(self.alerts.values())
+            if a.enabled and CONDITION_CODES.get(a.condition) in (SPREAD_ABOVE, ZSCORE_ABOVE)
+        )
+        self._price_alerts = None
+    
     def get_alerts(self) -> List[Dict]:
         """Get all alerts"""
         return [{
@@ -52,52 +97,129 @@ class AlertService:
             'last_triggered': a.last_triggered.isoformat() if a.last_triggered else None
         } for a in self.alerts.values()]
     
-    async def check_alerts(self, symbol: str, price: float):
-        """Check alerts for a symbol"""
-        from datetime import datetime
+    def _alerts_for_symbol(self, symbol: str) -> tuple:
+        """Get the enabled spread and z-score alerts for a symbol with their
+        thresholds and codes"""
+        cached = self._symbol_alerts.get(symbol)
+        if cached is None:
+            alerts = [a for a in list(self.alerts.values())
+                      if a.enabled and a.symbol == symbol
+                      and CONDITION_CODES.get(a.condition) in (SPREAD_ABOVE, ZSCORE_ABOVE)]
+            thresholds = np.fromiter((a.threshold for a in alerts),
+                                     dtype=np.float64, count=len(alerts))
+            codes = np.fromiter((CONDITION_CODES[a.condition] for a in alerts),
+                                dtype=np.int8, count=len(alerts))
+            cached = (alerts, thresholds, codes)
+            self._symbol_alerts[symbol] = cached
+        return cached
+    
+    def _price_alert_table(self) -> tuple:
+        """Get the enabled price alerts across all symbols as flat arrays"""
+        table = self._price_alerts
+        if table is None:
+            alerts = [a for a in list(self.alerts.values())
+                      if a.enabled and CONDITION_CODES.get(a.condition) in (PRICE_ABOVE, PRICE_BELOW)]
+            thresholds = np.fromiter((a.threshold for a in alerts),
+                                     dtype=np.float64, count=len(alerts))
+            below = np.fromiter((CONDITION_CODES[a.condition] == PRICE_BELOW for a in alerts),
+                                dtype=bool, count=len(alerts))
+            table = (alerts, thresholds, below, {})
+            self._price_alerts = table
+        return table
+    
+    def check_price_alerts(self, sym_index: Dict[str, int], prices: np.ndarray):
+        """Check every enabled price alert in one pass, where prices[sym_index[s]]
+        is the latest price of symbol s"""
+        alerts, thresholds, below, index_cache = self._price_alert_table()
+        if not alerts or len(prices) == 0:
+            return
         
-        for alert in self.alerts.values():
-            if not alert.enabled or alert.symbol != symbol:
-                continue
-            
-            try:
-                triggered = False
-                
-                if alert.condition == 'zscore >':
-                    # Need to compute z-score
-                    # For simplicity, we'll use a rolling window
-                    import pandas as pd
-                    spread_df = self.analytics_service.compute_spread(symbol, symbol, '1m')
-                    if not spread_df.empty and 'spread' in spread_df.columns:
-                        zscore = self.analytics_service.compute_zscore(spread_df['spread'])
-                        if len(zscore) > 0 and not pd.isna(zscore.iloc[-1]):
-                            if zscore.iloc[-1] > alert.threshold:
-                                triggered = True
-                
-                elif alert.condition == 'price >':
-                    if price > alert.threshold:
-                        triggered = True
-                elif alert.condition == 'price <':
-                    if price < alert.threshold:
-                        triggered = True
-                elif alert.condition == 'spread >':
-                    spread_df = self.analytics_service.compute_spread(symbol, symbol, '1m')
-                    if not spread_df.empty and 'spread' in spread_df.columns:
-                        if spread_df['spread'].iloc[-1] > alert.threshold:
-                            triggered = True
-                
-                if triggered and not alert.triggered:
-                    alert.triggered = True
-                    alert.last_triggered = datetime.now()
-                    # Could send notification here
-                    print(f"ALERT TRIGGERED: {alert.id} - {alert.symbol} {alert.condition} {alert.threshold}")
-                elif not triggered:
-                    alert.triggered = False
-                    
-            except Exception as e:
+        # Symbols are only ever appended to sym_index, so the mapping from
+        # alerts to price slots only changes when its size does
+        idx = index_cache.get(len(sym_index))
+        if idx is None:
+            idx = np.fromiter((sym_index.get(a.symbol, -1) for a in alerts),
+                              dtype=np.intp, count=len(alerts))
+            index_cache.clear()
+            index_cache[len(sym_index)] = idx
+        
+        # Alerts on symbols without a price yet are not checked
+        checked = (idx >= 0) & (idx < len(prices))
+        values = np.where(checked, prices[np.where(checked, idx, 0)], np.nan)
+        triggered = np.where(below, values < thresholds, values > thresholds)
+        self._apply_triggers(alerts, triggered, checked)
+    
+    async def check_alerts(self, symbol: str):
+        """Check spread and z-score alerts for a symbol (price alerts are
+        checked by check_price_alerts)"""
+        if not self._alerts_for_symbol(symbol)[0]:
+            return
+        # The spread needs a database query and a resample, so keep it off
+        # the event loop
+        await asyncio.to_thread(self._check_analytics_alerts, symbol)
+    
+    def _check_analytics_alerts(self, symbol: str):
+        alerts, thresholds, codes = self._alerts_for_symbol(symbol)
+        if not alerts:
+            return
+        
+        # Spread and z-score are shared by every alert on the symbol,
+        # so compute them at most once per check
+        latest_spread = np.nan
+        latest_zscore = np.nan
+        needs_zscore = (codes == ZSCORE_ABOVE).any()
+        try:
+            # For simplicity, we'll use a rolling window
+            spread_df = self.analytics_service.compute_spread(symbol, symbol, '1m')
+            if not spread_df.empty and 'spread' in spread_df.columns:
+                latest_spread = spread_df['spread'].iloc[-1]
+                if needs_zscore:
+                    zscore = self.analytics_service.compute_zscore(spread_df['spread'])
+                    if len(zscore) > 0 and not pd.isna(zscore.iloc[-1]):
+                        latest_zscore = zscore.iloc[-1]
+        except Exception as e:
+            for alert in alerts:
                 print(f"Error checking alert {alert.id}: {e}")
+            return
+        
+        # Compare every alert against the value its condition watches;
+        # NaN (no value available) never triggers
+        values = np.where(codes == SPREAD_ABOVE, latest_spread, latest_zscore)
+        triggered = values > thresholds
+        self._apply_triggers(alerts, triggered, np.ones(len(alerts), dtype=bool))
+    
+    def _apply_triggers(self, alerts: List[Alert], triggered: np.ndarray,
+                        checked: np.ndarray):
+        """Update alert states from a vectorized check, logging new triggers"""
+        was_triggered = np.fromiter((a.triggered for a in alerts),
+                                    dtype=bool, count=len(alerts))
+        for i in np.flatnonzero(checked & triggered & ~was_triggered):
+            alert = alerts[i]
+            alert.triggered = True
+            alert.last_triggered = datetime.now()
+            # Could send notification here
+            print(f"ALERT TRIGGERED: {alert.id} - {alert.symbol} {alert.condition} {alert.threshold}")
+        for i in np.flatnonzero(checked & ~triggered & was_triggered):
+            alerts[i].triggered = False
     
     def save_alerts(self):
+        """Schedule a save, coalescing changes made within the debounce window"""
+        with self._save_lock:
+            if self._save_timer is not None:
+                return
+            self._save_timer = threading.Timer(SAVE_DEBOUNCE_SECONDS, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+    
+    def flush(self):
+        """Write pending alert changes to file now"""
+        with self._save_lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+        self._write_alerts()
+    
+    def _write_alerts(self):
         """Save alerts to file"""
         try:
             data = [{
@@ -106,10 +228,10 @@ class AlertService:
                 'condition': a.condition,
                 'threshold': a.threshold,
                 'enabled': a.enabled
-            } for a in self.alerts.values()]
+            } for a in list(self.alerts.values())]
             
-            with open(self.alert_file, 'w') as f:
-                json.dump(data, f)
+            with open(self.alert_file, 'wb') as f:
+                f.write(orjson.dumps(data))
         except Exception as e:
             print(f"Error saving alerts: {e}")
     
@@ -119,8 +241,8 @@ class AlertService:
             return
         
         try:
-            with open(self.alert_file, 'r') as f:
-                data = json.load(f)
+            with open(self.alert_file, 'rb') as f:
+                data = orjson.loads(f.read())
             
             for item in data:
                 alert = Alert(
@@ -133,4 +255,5 @@ class AlertService:
                 self.alerts[alert.id] = alert
         except Exception as e:
             print(f"Error loading alerts: {e}")
+        self._refresh_alert_lookups()
 
@@ -5,42 +5,299 @@ import pandas as pd
 import numpy as np
 from scipy import stats
 from statsmodels.tsa.stattools import adfuller
-from statsmodels.regression.linear_model import OLS
 from sklearn.linear_model import HuberRegressor, TheilSenRegressor
-from pykalman import KalmanFilter
+from numba import njit
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
+import threading
+from collections import OrderedDict
 from services.data_service import DataService
 
+# Maximum number of OLS hedge-ratio results kept in memory
+OLS_CACHE_SIZE = 128
+
+# Maximum number of Kalman filter states kept in memory
+KALMAN_CACHE_SIZE = 128
+
+# Kalman process noise as a fraction of the initial state variance
+KALMAN_DELTA = 1e-4
+
+
+@njit(cache=True)
+def _price_stats(prices: np.ndarray):
+    """Mean, sample std, min and max of the non-NaN prices in one pass"""
+    nobs = 0
+    mean = 0.0
+    ssqdm = 0.0
+    min_price = np.inf
+    max_price = -np.inf
+    for val in prices:
+        if val != val:
+            continue
+        nobs += 1
+        delta = val - mean
+        mean += delta / nobs
+        ssqdm += delta * (val - mean)
+        if val < min_price:
+            min_price = val
+        if val > max_price:
+            max_price = val
+    if nobs == 0:
+        return np.nan, np.nan, np.nan, np.nan
+    std = np.sqrt(ssqdm / (nobs - 1)) if nobs > 1 else np.nan
+    return mean, std, min_price, max_price
+
+
+@njit(cache=True, error_model="numpy")
+def _rolling_zscore(x: np.ndarray, window: int) -> np.ndarray:
+    """Single-pass rolling z-score (sample std, NaN until window is full)"""
+    n = len(x)
+    out = np.empty(n)
+    nobs = 0
+    mean = 0.0
+    ssqdm = 0.0
+    # Run of identical values, so flat windows give exactly 0 variance
+    same_run = 0
+    prev = np.nan
+    for i in range(n):
+        val = x[i]
+        if val == val:
+            nobs += 1
+            delta = val - mean
+            mean += delta / nobs
+            ssqdm += (nobs - 1) * delta * delta / nobs
+            same_run = same_run + 1 if val == prev else 1
+        else:
+            same_run = 0
+        prev = val
+        if i >= window:
+            old = x[i - window]
+            if old == old:
+                nobs -= 1
+                if nobs > 0:
+                    delta = old - mean
+                    mean -= delta / nobs
+                    ssqdm -= (nobs + 1) * delta * delta / nobs
+                else:
+                    mean = 0.0
+                    ssqdm = 0.0
+        if nobs < window or val != val:
+            out[i] = np.nan
+        elif same_run >= window:
+            out[i] = np.nan
+        else:
+            var = ssqdm / (nobs - 1) if ssqdm > 0.0 else 0.0
+            out[i] = (val - mean) / np.sqrt(var)
+    return out
+
+
+@njit(cache=True, error_model="numpy")
+def _rolling_corr(x: np.ndarray, y: np.ndarray, window: int) -> np.ndarray:
+    """Single-pass rolling Pearson correlation (NaN until window is full)"""
+    n = len(x)
+    out = np.empty(n)
+    nobs = 0
+    mean_x = 0.0
+    mean_y = 0.0
+    # Co-moments updated Welford-style, which stays accurate at price levels
+    # where raw sums of squares cancel out
+    cxx = 0.0
+    cyy = 0.0
+    cxy = 0.0
+    for i in range(n):
+        xi = x[i]
+        yi = y[i]
+        if xi == xi and yi == yi:
+            nobs += 1
+            dx = xi - mean_x
+            dy = yi - mean_y
+            mean_x += dx / nobs
+            mean_y += dy / nobs
+            cxx += dx * (xi - mean_x)
+            cyy += dy * (yi - mean_y)
+            cxy += dx * (yi - mean_y)
+        if i >= window:
+            xo = x[i - window]
+            yo = y[i - window]
+            if xo == xo and yo == yo:
+                nobs -= 1
+                if nobs > 0:
+                    dx = xo - mean_x
+                    dy = yo - mean_y
+                    scale = (nobs + 1) / nobs
+                    mean_x -= dx / nobs
+                    mean_y -= dy / nobs
+                    cxx -= scale * dx * dx
+                    cyy -= scale * dy * dy
+                    cxy -= scale * dx * dy
+                else:
+                    mean_x = mean_y = 0.0
+                    cxx = cyy = cxy = 0.0
+        if nobs < window or cxx <= 0.0 or cyy <= 0.0:
+            out[i] = np.nan
+        else:
+            out[i] = cxy / np.sqrt(cxx * cyy)
+    return out
+
+
+@njit(cache=True)
+def _kalman_filter(y: np.ndarray, x: np.ndarray, state: np.ndarray,
+                   cov: np.ndarray, q: np.ndarray, r: float):
+    """Run Kalman predict/update steps for y = state[0] + state[1] * x"""
+    state = state.copy()
+    cov = cov.copy()
+    for i in range(len(y)):
+        # Predict: random-walk state, so only the covariance grows
+        p00 = cov[0, 0] + q[0, 0]
+        p01 = cov[0, 1] + q[0, 1]
+        p10 = cov[1, 0] + q[1, 0]
+        p11 = cov[1, 1] + q[1, 1]
+        
+        # Update with observation row H = [1, x]
+        xi = x[i]
+        ph0 = p00 + p01 * xi
+        ph1 = p10 + p11 * xi
+        s = ph0 + xi * ph1 + r
+        k0 = ph0 / s
+        k1 = ph1 / s
+        err = y[i] - (state[0] + state[1] * xi)
+        state[0] += k0 * err
+        state[1] += k1 * err
+        cov[0, 0] = p00 - k0 * ph0
+        cov[0, 1] = p01 - k0 * ph1
+        cov[1, 0] = p10 - k1 * ph0
+        cov[1, 1] = p11 - k1 * ph1
+    return state, cov
+
+
+@njit(cache=True)
+def _mean_reversion_backtest(z: np.ndarray, spread: np.ndarray,
+                             entry_z: float, exit_z: float):
+    """Run the z-score entry/exit state machine over a spread series
+
+    Returns (index, action, position, pnl) arrays with one element per trade
+    event; action is 1 for entries and 0 for exits, pnl is NaN on entries.
+    """
+    n = len(z)
+    idx = np.empty(n, dtype=np.int64)
+    action = np.empty(n, dtype=np.int8)
+    position = np.empty(n, dtype=np.int8)
+    pnl = np.empty(n)
+    count = 0
+    current_position = 0  # 0 = no position, 1 = long spread, -1 = short spread
+    entry_price = 0.0
+    
+    for i in range(n):
+        zi = z[i]
+        if np.isnan(zi):
+            continue
+        
+        # Entry signals
+        if current_position == 0:
+            if zi > entry_z:
+                current_position = -1  # Short spread (expect mean reversion)
+            elif zi < -entry_z:
+                current_position = 1  # Long spread
+            else:
+                continue
+            entry_price = spread[i]
+            idx[count] = i
+            action[count] = 1
+            position[count] = current_position
+            pnl[count] = np.nan
+            count += 1
+        
+        # Exit signals
+        elif (current_position == -1 and zi < exit_z) or (current_position == 1 and zi > -exit_z):
+            idx[count] = i
+            action[count] = 0
+            position[count] = 0
+            pnl[count] = (entry_price - spread[i]) * current_position
+            count += 1
+            current_position = 0
+    
+    return idx[:count], action[:count], position[:count], pnl[:count]
+
 
 class AnalyticsService:
     """Service for computing various trading analytics"""
     
     def __init__(self, data_service: DataService):
         self.data_service = data_service
+        # LRU of OLS results keyed on both symbols' data generations
+        self._ols_cache: "OrderedDict[tuple, Dict]" = OrderedDict()
+        self._ols_lock = threading.Lock()
+        # LRU of (symbol1, symbol2, timeframe, window) ->
+        # (last bar timestamp, state, state covariance, process noise, obs noise)
+        self._kalman_state: "OrderedDict[tuple, Tuple]" = OrderedDict()
+        self._kalman_lock = threading.Lock()
     
     def compute_price_stats(self, df: pd.DataFrame) -> Dict:
         """Compute basic price statistics"""
         if df.empty or 'close' not in df.columns:
             return {}
         
-        prices = df['close']
+        prices = df['close'].to_numpy(dtype=np.float64, copy=False)
+        mean, std, min_price, max_price = _price_stats(prices)
+        first = prices[0]
+        last = prices[-1]
         
         return {
-            'mean': float(prices.mean()),
-            'std': float(prices.std()),
-            'min': float(prices.min()),
-            'max': float(prices.max()),
-            'median': float(prices.median()),
-            'current': float(prices.iloc[-1]),
-            'change': float(prices.iloc[-1] - prices.iloc[0]),
-            'change_pct': float((prices.iloc[-1] - prices.iloc[0]) / prices.iloc[0] * 100) if prices.iloc[0] != 0 else 0
+            'mean': mean,
+            'std': std,
+            'min': min_price,
+            'max': max_price,
+            'median': float(np.nanmedian(prices)),
+            'current': float(last),
+            'change': float(last - first),
+            'change_pct': float((last - first) / first * 100) if first != 0 else 0
         }
     
+    def compute_price_stats_rolling(self, df: pd.DataFrame, window: int = 20) -> pd.DataFrame:
+        """Compute price statistics for each row over it and the previous `window` rows"""
+        if df.empty or 'close' not in df.columns:
+            return pd.DataFrame()
+        
+        prices = df['close']
+        rolling = prices.rolling(window=window + 1, min_periods=1)
+        
+        # First price of each window (the series start until a full window exists)
+        first = prices.shift(window).fillna(prices.iloc[0])
+        change = prices - first
+        
+        return pd.DataFrame({
+            'mean': rolling.mean(),
+            'std': rolling.std(),
+            'min': rolling.min(),
+            'max': rolling.max(),
+            'median': rolling.median(),
+            'current': prices,
+            'change': change,
+            'change_pct': np.where(first != 0, change / first.where(first != 0, 1) * 100, 0.0)
+        }, index=df.index)
+    
     def compute_ols_hedge_ratio(self, symbol1: str, symbol2: str, 
                                 timeframe: str = '1m',
                                 window: int = 100) -> Dict:
         """Compute hedge ratio using OLS regression"""
+        key = (symbol1, symbol2, timeframe, window,
+               self.data_service.get_generation(symbol1),
+               self.data_service.get_generation(symbol2))
+        with self._ols_lock:
+            cached = self._ols_cache.get(key)
+            if cached is not None:
+                self._ols_cache.move_to_end(key)
+                return dict(cached)
+        
+        result = self._compute_ols_hedge_ratio(symbol1, symbol2, timeframe, window)
+        with self._ols_lock:
+            self._ols_cache[key] = result
+            while len(self._ols_cache) > OLS_CACHE_SIZE:
+                self._ols_cache.popitem(last=False)
+        return dict(result)
+    
+    def _compute_ols_hedge_ratio(self, symbol1: str, symbol2: str,
+                                 timeframe: str, window: int) -> Dict:
         df1 = self.data_service.resample_data(symbol1, timeframe)
         df2 = self.data_service.resample_data(symbol2, timeframe)
         
@@ -62,16 +319,25 @@ class AnalyticsService:
         # Use rolling window
         merged = merged.tail(window)
         
-        y = merged['close_1'].values
-        x = merged['close_2'].values
-        
-        # OLS regression
-        x_with_const = np.column_stack([np.ones(len(x)), x])
-        ols_model = OLS(y, x_with_const).fit()
+        y = merged['close_1'].to_numpy(dtype=np.float64, copy=False)
+        x = merged['close_2'].to_numpy(dtype=np.float64, copy=False)
+        
+        # OLS regression (closed form for a single regressor)
+        x_mean = x.mean()
+        y_mean = y.mean()
+        x_dev = x - x_mean
+        y_dev = y - y_mean
+        sxx = (x_dev * x_dev).sum()
+        syy = (y_dev * y_dev).sum()
+        if sxx == 0 or syy == 0:
+            # A flat leg has no defined hedge ratio or R-squared
+            return {}
+        slope = (x_dev * y_dev).sum() / sxx
+        residuals = y_dev - slope * x_dev
         
-        hedge_ratio = float(ols_model.params[1])
-        intercept = float(ols_model.params[0])
-        r_squared = float(ols_model.rsquared)
+        hedge_ratio = float(slope)
+        intercept = float(y_mean - slope * x_mean)
+        r_squared = float(1 - (residuals * residuals).sum() / syy)
         
         return {
             'hedge_ratio': hedge_ratio,
@@ -86,6 +352,22 @@ class AnalyticsService:
                       timeframe: str = '1m',
                       hedge_ratio: Optional[float] = None) -> pd.DataFrame:
         """Compute spread between two symbols"""
+        if symbol1 == symbol2:
+            # A symbol regressed on itself has a hedge ratio of exactly 1,
+            # so skip the self-merge and the OLS fit
+            df = self.data_service.resample_data(symbol1, timeframe)
+            if df.empty:
+                return pd.DataFrame()
+            if hedge_ratio is None:
+                hedge_ratio = 1.0
+            close = df['close']
+            return pd.DataFrame({
+                'timestamp': df['timestamp'],
+                'spread': close * (1 - hedge_ratio),
+                'close_1': close,
+                'close_2': close
+            })
+        
         df1 = self.data_service.resample_data(symbol1, timeframe)
         df2 = self.data_service.resample_data(symbol2, timeframe)
         
@@ -109,14 +391,14 @@ class AnalyticsService:
     
     def compute_zscore(self, series: pd.Series, window: int = 20) -> pd.Series:
         """Compute rolling z-score"""
+        if window < 1:
+            # The kernel indexes x[i - window] unchecked
+            raise ValueError("window must be at least 1")
         if len(series) < window:
             return pd.Series(index=series.index, dtype=float)
         
-        rolling_mean = series.rolling(window=window).mean()
-        rolling_std = series.rolling(window=window).std()
-        
-        zscore = (series - rolling_mean) / rolling_std
-        return zscore
+        zscore = _rolling_zscore(series.to_numpy(dtype=np.float64, copy=False), window)
+        return pd.Series(zscore, index=series.index)
     
     def compute_adf_test(self, series: pd.Series) -> Dict:
         """Compute Augmented Dickey-Fuller test for stationarity"""
@@ -148,6 +430,9 @@ class AnalyticsService:
                                    timeframe: str = '1m',
                                    window: int = 20) -> pd.DataFrame:
         """Compute rolling correlation between two symbols"""
+        if window < 1:
+            # The kernel indexes x[i - window] unchecked
+            raise ValueError("window must be at least 1")
         df1 = self.data_service.resample_data(symbol1, timeframe)
         df2 = self.data_service.resample_data(symbol2, timeframe)
         
@@ -160,14 +445,28 @@ class AnalyticsService:
                          on='timestamp', 
                          suffixes=('_1', '_2'))
         
-        merged['rolling_corr'] = merged['close_1'].rolling(window=window).corr(merged['close_2'])
+        if len(merged) < window:
+            merged['rolling_corr'] = np.nan
+        else:
+            merged['rolling_corr'] = _rolling_corr(
+                merged['close_1'].to_numpy(dtype=np.float64, copy=False),
+                merged['close_2'].to_numpy(dtype=np.float64, copy=False),
+                window
+            )
         
         return merged[['timestamp', 'rolling_corr', 'close_1', 'close_2']]
     
     def compute_kalman_hedge_ratio(self, symbol1: str, symbol2: str,
                                    timeframe: str = '1m',
                                    window: int = 100) -> Dict:
-        """Compute hedge ratio using Kalman Filter"""
+        """Compute hedge ratio using an online Kalman Filter
+        
+        State is [intercept, hedge_ratio] with a random-walk transition. The
+        filtered state is cached per (pair, timeframe, window) and advanced
+        only by bars completed since the previous call; window sets the length
+        of the OLS fit the state is seeded from.
+        """
+        key = (symbol1, symbol2, timeframe, window)
         df1 = self.data_service.resample_data(symbol1, timeframe)
         df2 = self.data_service.resample_data(symbol2, timeframe)
         
@@ -186,24 +485,39 @@ class AnalyticsService:
         if window < 10:
             return {}
         
-        merged = merged.tail(window)
-        
-        y = merged['close_1'].values
-        x = merged['close_2'].values
-        
-        # Kalman Filter setup
-        kf = KalmanFilter(
-            transition_matrices=np.eye(2),
-            observation_matrices=np.vstack([np.ones(len(x)), x]).T,
-            initial_state_mean=[0, 1],
-            n_dim_state=2,
-            n_dim_obs=1
-        )
+        timestamps = merged['timestamp'].to_numpy()
+        y = merged['close_1'].to_numpy(dtype=np.float64, copy=False)
+        x = merged['close_2'].to_numpy(dtype=np.float64, copy=False)
         
         try:
-            state_means, _ = kf.em(y).smooth(y)
-            hedge_ratio = float(state_means[-1, 1])
-            intercept = float(state_means[-1, 0])
+            with self._kalman_lock:
+                cached = self._kalman_state.get(key)
+                if cached is None or cached[0] >= timestamps[-1]:
+                    # No usable state: seed from a batch OLS fit over the
+                    # window, excluding the bar that is still forming
+                    cached = self._init_kalman_state(timestamps[-window:-1],
+                                                     y[-window:-1], x[-window:-1])
+                    if cached is None:
+                        # Degenerate seed window: nothing is cached, so a
+                        # later call can seed from newer bars
+                        return {}
+                else:
+                    # Fold in bars completed since the last call
+                    last_ts, state, cov, q, r = cached
+                    new = (timestamps > last_ts)[:-1].nonzero()[0]
+                    if len(new):
+                        state, cov = _kalman_filter(y[new], x[new], state, cov, q, r)
+                        cached = (timestamps[new[-1]], state, cov, q, r)
+                self._kalman_state[key] = cached
+                self._kalman_state.move_to_end(key)
+                while len(self._kalman_state) > KALMAN_CACHE_SIZE:
+                    self._kalman_state.popitem(last=False)
+            
+            # The live bar updates a copy only, since its close will change
+            _, state, cov, q, r = cached
+            state, _ = _kalman_filter(y[-1:], x[-1:], state, cov, q, r)
+            hedge_ratio = float(state[1])
+            intercept = float(state[0])
             
             return {
                 'hedge_ratio': hedge_ratio,
@@ -216,6 +530,37 @@ class AnalyticsService:
             print(f"Error in Kalman Filter: {e}")
             return {}
     
+    def _init_kalman_state(self, timestamps: np.ndarray, y: np.ndarray,
+                           x: np.ndarray) -> Optional[Tuple]:
+        """Build a Kalman state from an OLS fit of y on [1, x], or None if the
+        window cannot be fitted (too short, flat x, or non-finite values)"""
+        if len(y) <= 2:
+            return None
+        x_mean = x.mean()
+        y_mean = y.mean()
+        x_dev = x - x_mean
+        y_dev = y - y_mean
+        sxx = (x_dev * x_dev).sum()
+        if not np.isfinite(sxx) or sxx == 0:
+            return None
+        slope = (x_dev * y_dev).sum() / sxx
+        intercept = y_mean - slope * x_mean
+        residuals = y_dev - slope * x_dev
+        
+        # Observation noise from the residuals, state covariance from the
+        # OLS parameter covariance, process noise as a fraction of it
+        r = max(float((residuals * residuals).sum() / (len(y) - 2)), 1e-12)
+        var_slope = r / sxx
+        cov = np.array([
+            [r / len(y) + x_mean * x_mean * var_slope, -x_mean * var_slope],
+            [-x_mean * var_slope, var_slope]
+        ])
+        q = KALMAN_DELTA * np.diag(np.diag(cov))
+        state = np.array([intercept, slope])
+        if not (np.isfinite(state).all() and np.isfinite(cov).all()):
+            return None
+        return timestamps[-1], state, cov, q, r
+    
     def compute_robust_regression(self, symbol1: str, symbol2: str,
                                  timeframe: str = '1m',
                                  method: str = 'huber',
@@ -241,8 +586,8 @@ class AnalyticsService:
         
         merged = merged.tail(window)
         
-        y = merged['close_1'].values
-        x = merged['close_2'].values.reshape(-1, 1)
+        y = merged['close_1'].to_numpy(dtype=np.float64, copy=False)
+        x = merged['close_2'].to_numpy(dtype=np.float64, copy=False).reshape(-1, 1)
         
         if method == 'huber':
             model = HuberRegressor()
@@ -282,55 +627,31 @@ class AnalyticsService:
         zscore = self.compute_zscore(spread_series, window)
         
         # Backtest logic
-        positions = []
-        current_position = 0  # 0 = no position, 1 = long spread, -1 = short spread
+        z = zscore.to_numpy(dtype=np.float64, copy=False)
+        spread = spread_series.to_numpy(dtype=np.float64, copy=False)
+        idx, action, position, pnl = _mean_reversion_backtest(z, spread, entry_z, exit_z)
+        timestamps = spread_df['timestamp'].iloc[idx].tolist()
+        zscores = z[idx].tolist()
+        spreads = spread[idx].tolist()
         
-        for i, z in enumerate(zscore):
-            if pd.isna(z):
-                continue
-            
-            # Entry signals
-            if current_position == 0:
-                if z > entry_z:
-                    current_position = -1  # Short spread (expect mean reversion)
-                    positions.append({
-                        'timestamp': spread_df.iloc[i]['timestamp'],
-                        'action': 'entry',
-                        'position': -1,
-                        'zscore': z,
-                        'spread': spread_series.iloc[i]
-                    })
-                elif z < -entry_z:
-                    current_position = 1  # Long spread
-                    positions.append({
-                        'timestamp': spread_df.iloc[i]['timestamp'],
-                        'action': 'entry',
-                        'position': 1,
-                        'zscore': z,
-                        'spread': spread_series.iloc[i]
-                    })
-            
-            # Exit signals
-            elif current_position != 0:
-                if (current_position == -1 and z < exit_z) or (current_position == 1 and z > -exit_z):
-                    entry_price = positions[-1]['spread'] if positions else spread_series.iloc[i]
-                    pnl = (entry_price - spread_series.iloc[i]) * current_position
-                    
-                    positions.append({
-                        'timestamp': spread_df.iloc[i]['timestamp'],
-                        'action': 'exit',
-                        'position': 0,
-                        'zscore': z,
-                        'spread': spread_series.iloc[i],
-                        'pnl': pnl
-                    })
-                    current_position = 0
-        
-        # Calculate statistics
-        exits = [p for p in positions if p['action'] == 'exit']
-        total_trades = len(exits)
-        total_pnl = sum(p.get('pnl', 0) for p in exits)
-        winning_trades = len([p for p in exits if p.get('pnl', 0) > 0])
+        positions = []
+        for k in range(len(idx)):
+            trade = {
+                'timestamp': timestamps[k],
+                'action': 'entry' if action[k] else 'exit',
+                'position': int(position[k]),
+                'zscore': zscores[k],
+                'spread': spreads[k]
+            }
+            if not action[k]:
+                trade['pnl'] = float(pnl[k])
+            positions.append(trade)
+        
+        # Calculate statistics from the kernel's arrays
+        exit_pnl = pnl[action == 0]
+        total_trades = len(exit_pnl)
+        total_pnl = float(exit_pnl.sum())
+        winning_trades = int(np.count_nonzero(exit_pnl > 0))
         win_rate = winning_trades / total_trades if total_trades > 0 else 0
         
         return {
@@ -4,66 +4,126 @@ Data service for storing and retrieving trading data
 
 from database.database import SessionLocal
 from database.models import TickData, OHLCData
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, NamedTuple, Optional, Union
 import pandas as pd
 import asyncio
+import threading
+from collections import OrderedDict, defaultdict
 from concurrent.futures import ThreadPoolExecutor
 
+# Maximum number of resampled frames kept in memory
+RESAMPLE_CACHE_SIZE = 128
+
+# Pandas resample frequency for each supported timeframe
+TIMEFRAME_FREQ = {"1s": "1S", "1m": "1T", "5m": "5T"}
+
+# Most recent ticks per symbol that resampling reads
+RESAMPLE_TICK_LIMIT = 10000
+
+OHLC_COLUMNS = [
+    "timestamp",
+    "symbol",
+    "timeframe",
+    "open",
+    "high",
+    "low",
+    "close",
+    "volume",
+]
+
+
+class Tick(NamedTuple):
+    """A single trade tick as received from the exchange"""
+
+    timestamp: datetime
+    symbol: str
+    price: float
+    quantity: float
+
+
+@contextmanager
+def _session_scope(session: Optional[Session] = None):
+    """Yield the caller's session, or a new one that is closed afterwards"""
+    if session is not None:
+        yield session
+        return
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
 
 class DataService:
     """Service for data storage and retrieval"""
 
     def __init__(self):
         self.executor = ThreadPoolExecutor(max_workers=4)
-
-    async def store_tick(self, tick_data: Dict):
+        # Bumped whenever a tick is stored, so cached analytics can tell
+        # whether a symbol's data has changed
+        self._generations: Dict[str, int] = {}
+        # Ticks stored per symbol since startup (for debug output)
+        self._tick_counts: Dict[str, int] = defaultdict(int)
+        # LRU of resample_data results keyed on the symbol's generation
+        self._resample_cache: "OrderedDict[tuple, pd.DataFrame]" = OrderedDict()
+        self._resample_lock = threading.Lock()
+        # Timestamp of the newest OHLC bar written per (symbol, timeframe),
+        # None if there is none yet
+        self._ohlc_watermarks: Dict[tuple, Optional[pd.Timestamp]] = {}
+
+    def get_generation(self, symbol: str) -> int:
+        """Get the data generation counter for a symbol"""
+        return self._generations.get(symbol, 0)
+
+    async def store_tick(self, tick_data: Tick):
         """Store tick data asynchronously"""
-        try:
-            loop = asyncio.get_event_loop()
-        except RuntimeError:
-            # If no event loop in current thread, create one
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
+        loop = asyncio.get_running_loop()
         await loop.run_in_executor(self.executor, self._store_tick_sync, tick_data)
 
-    def _store_tick_sync(self, tick_data: Dict):
+    def _store_tick_sync(self, tick_data: Union[Tick, Dict]):
         """Synchronously store tick data"""
+        if isinstance(tick_data, dict):
+            tick_data = Tick(**tick_data)
+        self._store_ticks_bulk([tick_data])
+
+    def _store_ticks_bulk(self, batch: List[Tick]):
+        """Store a batch of ticks with one executemany INSERT and one commit"""
         db = SessionLocal()
         try:
-            tick = TickData(
-                timestamp=tick_data["timestamp"],
-                symbol=tick_data["symbol"],
-                price=tick_data["price"],
-                quantity=tick_data["quantity"],
+            db.execute(
+                insert(TickData),
+                [t._asdict() for t in batch],
             )
-            db.add(tick)
             db.commit()
+        except Exception as e:
+            print(f"✗ Error storing {len(batch)} ticks: {e}")
+            import traceback
+
+            traceback.print_exc()
+            db.rollback()
+            return
+        finally:
+            db.close()
+
+        for tick_data in batch:
+            symbol = tick_data.symbol
+            self._generations[symbol] = self._generations.get(symbol, 0) + 1
 
             # Debug: Print first few stored ticks and periodic updates
-            count = (
-                db.query(TickData)
-                .filter(TickData.symbol == tick_data["symbol"])
-                .count()
-            )
+            self._tick_counts[symbol] += 1
+            count = self._tick_counts[symbol]
             if count <= 5:
                 print(
-                    f"✓ Stored tick #{count}: {tick_data['symbol']} @ ${tick_data['price']:.2f} at {tick_data['timestamp']}"
+                    f"✓ Stored tick #{count}: {symbol} @ ${tick_data.price:.2f} at {tick_data.timestamp}"
                 )
             elif count % 100 == 0:
                 print(
-                    f"✓ Stored {count} ticks for {tick_data['symbol']} (latest: ${tick_data['price']:.2f})"
+                    f"✓ Stored {count} ticks for {symbol} (latest: ${tick_data.price:.2f})"
                 )
-        except Exception as e:
-            print(
-                f"✗ Error storing tick data for {tick_data.get('symbol', 'unknown')}: {e}"
-            )
-            import traceback
-
-            traceback.print_exc()
-            db.rollback()
-        finally:
-            db.close()
 
     def get_ticks(
         self,
@@ -71,11 +131,13 @@ class DataService:
         start_time: Optional[datetime] = None,
         end_time: Optional[datetime] = None,
         limit: int = 10000,
+        session: Optional[Session] = None,
     ) -> pd.DataFrame:
         """Get tick data as DataFrame"""
-        db = SessionLocal()
-        try:
-            query = db.query(TickData).filter(TickData.symbol == symbol)
+        with _session_scope(session) as db:
+            query = db.query(
+                TickData.timestamp, TickData.symbol, TickData.price, TickData.quantity
+            ).filter(TickData.symbol == symbol)
 
             if start_time:
                 query = query.filter(TickData.timestamp >= start_time)
@@ -84,26 +146,24 @@ class DataService:
 
             query = query.order_by(TickData.timestamp.desc()).limit(limit)
 
-            ticks = query.all()
-
-            data = [
-                {
-                    "timestamp": t.timestamp,
-                    "symbol": t.symbol,
-                    "price": t.price,
-                    "quantity": t.quantity,
-                }
-                for t in ticks
-            ]
+            # Read rows straight into typed columns, skipping ORM objects
+            df = pd.read_sql_query(
+                query.statement, db.connection(), parse_dates=["timestamp"]
+            )
 
-            if not data:
+            if df.empty:
                 return pd.DataFrame()
 
-            df = pd.DataFrame(data)
             df = df.sort_values("timestamp")
             return df
-        finally:
-            db.close()
+
+    def has_ticks(self, symbol: str, session: Optional[Session] = None) -> bool:
+        """Check whether any tick data exists for a symbol"""
+        with _session_scope(session) as db:
+            return (
+                db.query(TickData.id).filter(TickData.symbol == symbol).first()
+                is not None
+            )
 
     def resample_data(
         self,
@@ -111,10 +171,112 @@ class DataService:
         timeframe: str,
         start_time: Optional[datetime] = None,
         end_time: Optional[datetime] = None,
+        session: Optional[Session] = None,
     ) -> pd.DataFrame:
         """Resample tick data to OHLC"""
-        df = self.get_ticks(symbol, start_time, end_time)
+        key = (symbol, timeframe, start_time, end_time, self.get_generation(symbol))
+        with self._resample_lock:
+            cached = self._resample_cache.get(key)
+            if cached is not None:
+                self._resample_cache.move_to_end(key)
+                return cached.copy(deep=False)
+
+        ticks = self.get_ticks(
+            symbol, start_time, end_time, limit=RESAMPLE_TICK_LIMIT, session=session
+        )
+        result = self._resample_frame(ticks, symbol, timeframe)
+        self._store_closed_bars(
+            self._new_closed_bars(
+                symbol,
+                timeframe,
+                result,
+                start_time,
+                end_time,
+                truncated=len(ticks) >= RESAMPLE_TICK_LIMIT,
+                session=session,
+            )
+        )
+        self._cache_resample(key, result)
+        return result.copy(deep=False)
 
+    def _new_closed_bars(
+        self,
+        symbol: str,
+        timeframe: str,
+        bars: pd.DataFrame,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        truncated: bool = False,
+        session: Optional[Session] = None,
+    ) -> pd.DataFrame:
+        """Select completed bars newer than the last ones written for this key
+
+        truncated means the tick query hit its row limit, so older ticks of
+        the first bar may be missing.
+        """
+        if bars.empty:
+            return bars
+        # A bar is complete once its whole interval has passed, within the
+        # queried window
+        cutoff = pd.Timestamp(datetime.now())
+        if end_time is not None:
+            cutoff = min(cutoff, pd.Timestamp(end_time))
+        cutoff -= pd.Timedelta(TIMEFRAME_FREQ.get(timeframe, "1T"))
+        timestamps = bars["timestamp"]
+        mask = timestamps <= cutoff
+        # The first bar only holds all of its ticks if the fetched window
+        # reaches back to its open
+        if truncated or (
+            start_time is not None and pd.Timestamp(start_time) > timestamps.iloc[0]
+        ):
+            mask.iloc[0] = False
+        key = (symbol, timeframe)
+        self._seed_ohlc_watermark(key, session)
+        with self._resample_lock:
+            watermark = self._ohlc_watermarks.get(key)
+            if watermark is not None:
+                mask &= timestamps > watermark
+            if not mask.any():
+                return bars.iloc[:0]
+            new_bars = bars[mask]
+            self._ohlc_watermarks[key] = new_bars["timestamp"].iloc[-1]
+        return new_bars
+
+    def _seed_ohlc_watermark(self, key: tuple, session: Optional[Session] = None):
+        """On first use of a (symbol, timeframe), start its watermark at the
+        newest bar already in the database, so bars written before a restart
+        are not inserted again"""
+        with self._resample_lock:
+            if key in self._ohlc_watermarks:
+                return
+        symbol, timeframe = key
+        with _session_scope(session) as db:
+            latest = (
+                db.query(func.max(OHLCData.timestamp))
+                .filter(OHLCData.symbol == symbol, OHLCData.timeframe == timeframe)
+                .scalar()
+            )
+        with self._resample_lock:
+            self._ohlc_watermarks.setdefault(
+                key, pd.Timestamp(latest) if latest is not None else None
+            )
+
+    def _store_closed_bars(self, bars: pd.DataFrame):
+        """Write bars in the background so reads never wait on the insert"""
+        if not bars.empty:
+            self.executor.submit(self._store_ohlc, bars)
+
+    def _cache_resample(self, key: tuple, result: pd.DataFrame):
+        with self._resample_lock:
+            self._resample_cache[key] = result
+            self._resample_cache.move_to_end(key)
+            while len(self._resample_cache) > RESAMPLE_CACHE_SIZE:
+                self._resample_cache.popitem(last=False)
+
+    def _resample_frame(
+        self, df: pd.DataFrame, symbol: str, timeframe: str
+    ) -> pd.DataFrame:
+        """Resample one symbol's ticks to OHLC bars"""
         if df.empty:
             print(f"No tick data available for {symbol} to resample")
             return pd.DataFrame()
@@ -124,9 +286,7 @@ class DataService:
         df = df.set_index("timestamp")
 
         # Resample based on timeframe
-        timeframe_map = {"1s": "1S", "1m": "1T", "5m": "5T"}
-
-        freq = timeframe_map.get(timeframe, "1T")
+        freq = TIMEFRAME_FREQ.get(timeframe, "1T")
 
         ohlc = df["price"].resample(freq).ohlc()
         volume = df["quantity"].resample(freq).sum()
@@ -153,33 +313,23 @@ class DataService:
 
         print(f"Resampled to {len(result)} OHLC bars for {symbol}")
 
-        # Store OHLC data
-        self._store_ohlc(result)
-
         return result
 
-    def _store_ohlc(self, ohlc_df: pd.DataFrame):
+    def _store_ohlc(self, ohlc_df: pd.DataFrame, session: Optional[Session] = None):
         """Store OHLC data"""
-        db = SessionLocal()
-        try:
-            for _, row in ohlc_df.iterrows():
-                ohlc = OHLCData(
-                    timestamp=row["timestamp"],
-                    symbol=row["symbol"],
-                    timeframe=row["timeframe"],
-                    open=row["open"],
-                    high=row["high"],
-                    low=row["low"],
-                    close=row["close"],
-                    volume=row.get("volume", 0),
-                )
-                db.add(ohlc)
-            db.commit()
-        except Exception as e:
-            print(f"Error storing OHLC data: {e}")
-            db.rollback()
-        finally:
-            db.close()
+        if ohlc_df.empty:
+            return
+        with _session_scope(session) as db:
+            try:
+                if "volume" not in ohlc_df:
+                    ohlc_df = ohlc_df.assign(volume=0)
+                records = ohlc_df[OHLC_COLUMNS].to_dict("records")
+                # One executemany INSERT instead of building an ORM object per bar
+                db.execute(insert(OHLCData), records)
+                db.commit()
+            except Exception as e:
+                print(f"Error storing OHLC data: {e}")
+                db.rollback()
 
     def get_ohlc(
         self,
@@ -187,13 +337,13 @@ class DataService:
         timeframe: str,
         start_time: Optional[datetime] = None,
         end_time: Optional[datetime] = None,
+        session: Optional[Session] = None,
     ) -> pd.DataFrame:
         """Get OHLC data"""
-        db = SessionLocal()
-        try:
-            query = db.query(OHLCData).filter(
-                OHLCData.symbol == symbol, OHLCData.timeframe == timeframe
-            )
+        with _session_scope(session) as db:
+            query = db.query(
+                *(getattr(OHLCData, column) for column in OHLC_COLUMNS)
+            ).filter(OHLCData.symbol == symbol, OHLCData.timeframe == timeframe)
 
             if start_time:
                 query = query.filter(OHLCData.timestamp >= start_time)
@@ -202,28 +352,14 @@ class DataService:
 
             query = query.order_by(OHLCData.timestamp)
 
-            ohlc_data = query.all()
+            df = pd.read_sql_query(
+                query.statement, db.connection(), parse_dates=["timestamp"]
+            )
 
-            if not ohlc_data:
+            if df.empty:
                 return pd.DataFrame()
 
-            data = [
-                {
-                    "timestamp": o.timestamp,
-                    "symbol": o.symbol,
-                    "timeframe": o.timeframe,
-                    "open": o.open,
-                    "high": o.high,
-                    "low": o.low,
-                    "close": o.close,
-                    "volume": o.volume,
-                }
-                for o in ohlc_data
-            ]
-
-            return pd.DataFrame(data)
-        finally:
-            db.close()
+            return df
 
     def get_multiple_symbols(
         self,
@@ -231,13 +367,108 @@ class DataService:
         timeframe: str = "1m",
         start_time: Optional[datetime] = None,
         end_time: Optional[datetime] = None,
+        session: Optional[Session] = None,
     ) -> Dict[str, pd.DataFrame]:
         """Get data for multiple symbols"""
+        with _session_scope(session) as db:
+            return self._get_multiple_symbols(
+                db, symbols, timeframe, start_time, end_time
+            )
+
+    def _get_multiple_symbols(
+        self,
+        db: Session,
+        symbols: List[str],
+        timeframe: str,
+        start_time: Optional[datetime],
+        end_time: Optional[datetime],
+    ) -> Dict[str, pd.DataFrame]:
+        if timeframe not in ["1s", "1m", "5m"]:
+            return {
+                symbol: self.get_ohlc(
+                    symbol, timeframe, start_time, end_time, session=db
+                )
+                for symbol in symbols
+            }
+
         result = {}
-        for symbol in symbols:
-            if timeframe in ["1s", "1m", "5m"]:
-                df = self.resample_data(symbol, timeframe, start_time, end_time)
+        missing = {}
+        for symbol in dict.fromkeys(symbols):
+            key = (symbol, timeframe, start_time, end_time, self.get_generation(symbol))
+            with self._resample_lock:
+                cached = self._resample_cache.get(key)
+                if cached is not None:
+                    self._resample_cache.move_to_end(key)
+            if cached is not None:
+                result[symbol] = cached.copy(deep=False)
             else:
-                df = self.get_ohlc(symbol, timeframe, start_time, end_time)
-            result[symbol] = df
-        return result
+                missing[symbol] = key
+
+        if missing:
+            # One query for every symbol that is not cached
+            ticks = self._get_ticks_multi(
+                list(missing), start_time, end_time, limit=RESAMPLE_TICK_LIMIT, session=db
+            )
+            groups = (
+                {symbol: df for symbol, df in ticks.groupby("symbol", sort=False)}
+                if not ticks.empty
+                else {}
+            )
+            frames = []
+            for symbol, key in missing.items():
+                df = groups.get(symbol)
+                if df is None:
+                    df = pd.DataFrame()
+                else:
+                    df = df.sort_values("timestamp")
+                bars = self._resample_frame(df, symbol, timeframe)
+                self._cache_resample(key, bars)
+                frames.append(
+                    self._new_closed_bars(
+                        symbol,
+                        timeframe,
+                        bars,
+                        start_time,
+                        end_time,
+                        truncated=len(df) >= RESAMPLE_TICK_LIMIT,
+                        session=db,
+                    )
+                )
+                result[symbol] = bars.copy(deep=False)
+            frames = [f for f in frames if not f.empty]
+            if frames:
+                self._store_closed_bars(pd.concat(frames, ignore_index=True))
+
+        return {symbol: result[symbol] for symbol in symbols}
+
+    def _get_ticks_multi(
+        self,
+        symbols: List[str],
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        limit: int = 10000,
+        session: Optional[Session] = None,
+    ) -> pd.DataFrame:
+        """Get the latest ticks for several symbols in one query"""
+        ranked = select(
+            TickData.timestamp,
+            TickData.symbol,
+            TickData.price,
+            TickData.quantity,
+            func.row_number()
+            .over(partition_by=TickData.symbol, order_by=TickData.timestamp.desc())
+            .label("rn"),
+        ).where(TickData.symbol.in_(symbols))
+
+        if start_time:
+            ranked = ranked.where(TickData.timestamp >= start_time)
+        if end_time:
+            ranked = ranked.where(TickData.timestamp <= end_time)
+
+        ranked = ranked.subquery()
+        query = select(
+            ranked.c.timestamp, ranked.c.symbol, ranked.c.price, ranked.c.quantity
+        ).where(ranked.c.rn <= limit)
+
+        with _session_scope(session) as db:
+            return pd.read_sql_query(query, db.connection(), parse_dates=["timestamp"])
@@ -3,14 +3,85 @@ WebSocket service for Binance data ingestion
 """
 
 import asyncio
-import websocket
-import json
+import random
+import websockets
+import msgspec
+import numpy as np
+import orjson
 from datetime import datetime
 from typing import Dict, List, Optional
+import os
+import sys
 import threading
-from services.data_service import DataService
+import traceback
+from collections import deque
+from services.data_service import DataService, Tick
 from services.alert_service import AlertService
 
+# Verbose per-message logging, e.g. WS_DEBUG=1
+DEBUG = os.getenv("WS_DEBUG", "").lower() in ("1", "true", "yes")
+
+# Maximum ticks buffered per downstream client before the oldest are dropped
+CLIENT_QUEUE_SIZE = 1000
+
+# Initial number of symbols the latest-tick arrays hold; they double when full
+SYMBOL_CAPACITY = 64
+
+# Seconds start() waits for the first connection before carrying on
+CONNECT_TIMEOUT = 5
+
+# Seconds between alert checks; ticks arriving in between are evaluated together
+ALERT_CHECK_INTERVAL = 0.1
+
+# Ticks held for the database writer; the oldest are dropped if it falls behind
+TICK_QUEUE_SIZE = 10000
+# Maximum ticks written per insert
+TICK_BATCH_SIZE = 512
+# Seconds the writer waits for new ticks before checking again
+TICK_FLUSH_WAIT = 0.01
+
+
+class TickerData(msgspec.Struct):
+    """Fields used from a Binance 24hr ticker event"""
+
+    s: Optional[str] = None  # Symbol
+    c: Optional[float] = None  # Last price
+    q: float = 0.0  # Last quantity
+    E: int = 0  # Event time (ms)
+
+
+class BinanceMessage(msgspec.Struct):
+    """A combined-stream frame ({"stream", "data"}) or a direct ticker event"""
+
+    stream: Optional[str] = None
+    data: Optional[TickerData] = None
+    s: Optional[str] = None
+    c: Optional[float] = None
+    q: float = 0.0
+    E: int = 0
+
+
+class CombinedMessage(msgspec.Struct):
+    """A combined-stream frame: {"stream": ..., "data": <ticker event>}"""
+
+    stream: Optional[str] = None
+    data: Optional[TickerData] = None
+
+
+# Binance sends prices and quantities as strings; strict=False converts them
+_message_decoder = msgspec.json.Decoder(BinanceMessage, strict=False)
+# Decoders for a connection whose frame format is already known
+_combined_decoder = msgspec.json.Decoder(CombinedMessage, strict=False)
+_ticker_decoder = msgspec.json.Decoder(TickerData, strict=False)
+
+
+def _parse_combined(message: bytes) -> Optional[TickerData]:
+    return _combined_decoder.decode(message).data
+
+
+def _parse_direct(message: bytes) -> Optional[TickerData]:
+    return _ticker_decoder.decode(message)
+
 
 class WebSocketService:
     """Service to handle Binance WebSocket connections and data ingestion"""
@@ -21,33 +92,154 @@ class WebSocketService:
         self.ws = None
         self.running = False
         self.subscribed_symbols = set()
-        self.latest_data = {}
-        self.lock = threading.Lock()
+        # Stream URL for subscribed_symbols, built on first use
+        self._url: Optional[str] = None
+        # Latest tick per symbol as parallel arrays indexed by _sym_index;
+        # only touched from the event loop
+        self._sym_index: Dict[str, int] = {}
+        self._symbols: List[str] = []
+        self._prices = np.zeros(SYMBOL_CAPACITY)
+        self._quantities = np.zeros(SYMBOL_CAPACITY)
+        self._timestamps = np.zeros(SYMBOL_CAPACITY, dtype=np.int64)  # ms
         self._reconnect_attempts = 0
+        # Per-connection queues of downstream /ws clients
+        self._clients = set()
+        self._task: Optional[asyncio.Task] = None
+        # Set once the first connection to Binance is open
+        self._ready: Optional[asyncio.Event] = None
+        # Frame parser; replaced by a format-specific one after the first
+        # ticker frame of each connection
+        self._parse = self._parse_first
+        # Ticks waiting to be written by the flusher thread
+        self._tick_queue = deque(maxlen=TICK_QUEUE_SIZE)
+        self._tick_event = threading.Event()
+        self._flusher_thread: Optional[threading.Thread] = None
+        self._alert_task: Optional[asyncio.Task] = None
+        # Set when a tick arrives, cleared by the next alert check
+        self._prices_dirty = False
+        # Price each symbol's spread/z-score alerts were last checked at
+        self._last_alert_price: Dict[str, float] = {}
+        # Last analytics-symbol set seen, to notice when alerts change
+        self._analytics_symbols: frozenset = frozenset()
+        # Interned symbol strings, so dict keys reuse one object and its cached hash
+        self._symbol_intern: Dict[str, str] = {}
 
     async def start(self):
         """Start WebSocket connection"""
         self.running = True
-        # Start in a separate thread
-        print("Creating WebSocket thread...")
-        thread = threading.Thread(target=self._run_websocket, daemon=True)
-        thread.start()
-        print(f"WebSocket thread started: {thread.is_alive()}")
-        # Give it a moment to start
-        import time
-
-        time.sleep(1)
+        self._flusher_thread = threading.Thread(target=self._flush_ticks, daemon=True)
+        self._flusher_thread.start()
+        self._ready = asyncio.Event()
+        # Run the Binance connection as a task on this event loop
+        self._task = asyncio.create_task(self._ws_loop())
+        self._alert_task = asyncio.create_task(self._alert_loop())
+        # Wait for the connection to open; if it does not, keep starting up
+        # and let _ws_loop keep retrying in the background
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout=CONNECT_TIMEOUT)
+        except asyncio.TimeoutError:
+            print(f"Binance WebSocket not connected after {CONNECT_TIMEOUT}s, retrying in background")
 
     async def stop(self):
         """Stop WebSocket connection"""
         self.running = False
         if self.ws:
-            self.ws.close()
+            await self.ws.close()
+        for task in (self._task, self._alert_task):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        # Let the flusher write whatever is still queued
+        self._tick_event.set()
+        if self._flusher_thread:
+            self._flusher_thread.join(timeout=5)
+
+    def _flush_ticks(self):
+        """Drain queued ticks into batched inserts (runs in its own thread)"""
+        while self.running or self._tick_queue:
+            self._tick_event.wait(timeout=TICK_FLUSH_WAIT)
+            self._tick_event.clear()
+            while self._tick_queue:
+                batch = []
+                while self._tick_queue and len(batch) < TICK_BATCH_SIZE:
+                    batch.append(self._tick_queue.popleft())
+                # Logs and rolls back its own failures
+                self.data_service._store_ticks_bulk(batch)
+
+    def _add_symbol(self, symbol: str) -> int:
+        """Assign the next array slot to a new symbol, growing the arrays if full"""
+        i = len(self._symbols)
+        if i == len(self._prices):
+            size = 2 * i
+            self._prices = np.resize(self._prices, size)
+            self._quantities = np.resize(self._quantities, size)
+            self._timestamps = np.resize(self._timestamps, size)
+        self._symbols.append(symbol)
+        self._sym_index[symbol] = i
+        return i
+
+    def register_client(self) -> asyncio.Queue:
+        """Register a downstream client and return the queue ticks are pushed to"""
+        queue = asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE)
+        self._clients.add(queue)
+        return queue
+
+    def unregister_client(self, queue: asyncio.Queue):
+        """Stop pushing ticks to a client's queue"""
+        self._clients.discard(queue)
+
+    def _publish(self, tick: Tick):
+        """Push a tick to every client queue"""
+        for queue in list(self._clients):
+            if queue.full():
+                # Slow client: drop its oldest tick rather than grow unbounded
+                queue.get_nowait()
+            queue.put_nowait(tick)
+
+    async def _alert_loop(self):
+        """Check alerts every ALERT_CHECK_INTERVAL seconds if any tick arrived"""
+        while self.running:
+            await asyncio.sleep(ALERT_CHECK_INTERVAL)
+            if not self._prices_dirty:
+                continue
+            self._prices_dirty = False
+            try:
+                await self._check_alerts()
+            except Exception as e:
+                print(f"Error checking alerts: {e}")
+
+    async def _check_alerts(self):
+        """Check price alerts across all symbols at once, then run check_alerts
+        for symbols with spread/z-score alerts whose price moved"""
+        n = len(self._symbols)
+        self.alert_service.check_price_alerts(self._sym_index, self._prices[:n])
+
+        watched = self.alert_service.get_analytics_symbols()
+        if watched is not self._analytics_symbols:
+            # Alerts changed: re-check every symbol
+            self._analytics_symbols = watched
+            self._last_alert_price.clear()
+        for symbol in watched:
+            i = self._sym_index.get(symbol)
+            if i is None:
+                continue
+            price = float(self._prices[i])
+            if self._last_alert_price.get(symbol) == price:
+                continue
+            self._last_alert_price[symbol] = price
+            await self.alert_service.check_alerts(symbol)
 
     def subscribe_symbols(self, symbols: List[str]):
         """Subscribe to symbols"""
+        for s in symbols:
+            s = s.upper()
+            self._symbol_intern.setdefault(s, sys.intern(s))
         self.subscribed_symbols.update(symbols)
-        if self.ws and self.ws.sock and self.ws.sock.connected:
+        self._url = None
+        if self.ws is not None:
             self._subscribe(symbols)
 
     def _subscribe(self, symbols: List[str]):
@@ -56,143 +248,63 @@ class WebSocketService:
             return
 
         # For combined streams, we reconnect with new streams
-        # This is handled in _run_websocket
+        # This is handled in _ws_loop
         pass
 
-    def _run_websocket(self):
-        """Run WebSocket in a separate thread"""
-        print("_run_websocket thread started")
-
-        def on_message(ws, message):
+    def _ws_url(self) -> str:
+        """Get the Binance stream URL for the subscribed symbols, rebuilding
+        it only after the subscription changes"""
+        if self._url is None:
+            # Use combined stream for multiple symbols
+            if self.subscribed_symbols:
+                streams = [f"{s.lower()}@ticker" for s in self.subscribed_symbols]
+                # Binance combined stream format: stream1/stream2/stream3
+                stream_names = "/".join(streams)
+                self._url = f"wss://stream.binance.com:9443/stream?streams={stream_names}"
+                print(f"Streams: {streams}")
+            else:
+                self._url = "wss://stream.binance.com:9443/ws"
+        return self._url
+
+    async def _ws_loop(self):
+        """Receive Binance messages, reconnecting with backoff until stopped"""
+        while self.running:
+            url = self._ws_url()
+            if self.subscribed_symbols:
+                print(f"Connecting to Binance WebSocket: {url}")
+            else:
+                print(f"Connecting to Binance WebSocket: {url} (no symbols subscribed)")
             try:
-                data = json.loads(message)
-
-                # Debug: Print first few messages to see format
-                if not hasattr(on_message, "_msg_count"):
-                    on_message._msg_count = 0
-                on_message._msg_count += 1
-                if on_message._msg_count <= 3:
-                    print(
-                        f"Received Binance message #{on_message._msg_count}: {str(data)[:200]}"
-                    )
-
-                # Handle ticker data - Binance stream format
-                if "stream" in data and "data" in data:
-                    # Combined stream format
-                    stream_data = data["data"]
-                    if "c" in stream_data and "s" in stream_data:
-                        symbol = stream_data["s"]
-                        price = float(stream_data["c"])  # Last price
-                        quantity = float(stream_data.get("q", 0))  # Last quantity
-                        timestamp = datetime.fromtimestamp(
-                            stream_data.get("E", 0) / 1000
-                        )
-
-                        tick_data = {
-                            "timestamp": timestamp,
-                            "symbol": symbol,
-                            "price": price,
-                            "quantity": quantity,
-                        }
-
-                        # Debug: Print first few messages
-                        if symbol not in self.latest_data or len(self.latest_data) < 3:
-                            print(
-                                f"Received data for {symbol}: price={price}, qty={quantity}"
-                            )
-
-                        # Store data - call sync method directly from thread
-                        # This avoids event loop issues when called from WebSocket thread
-                        try:
-                            # Debug: Print before storing
-                            if not hasattr(on_message, "_stored_count"):
-                                on_message._stored_count = {}
-                            if symbol not in on_message._stored_count:
-                                on_message._stored_count[symbol] = 0
-
-                            self.data_service._store_tick_sync(tick_data)
-                            on_message._stored_count[symbol] += 1
-
-                            # Print first few successful stores
-                            if on_message._stored_count[symbol] <= 3:
-                                print(
-                                    f"✓ Successfully stored tick #{on_message._stored_count[symbol]} for {symbol}"
-                                )
-                        except Exception as e:
-                            print(f"✗ Error storing tick for {symbol} in thread: {e}")
-                            import traceback
-
-                            traceback.print_exc()
-
-                        # Update latest data
-                        with self.lock:
-                            self.latest_data[symbol] = {
-                                "timestamp": timestamp.isoformat(),
-                                "symbol": symbol,
-                                "price": price,
-                                "quantity": quantity,
-                            }
-
-                        # Check alerts
-                        try:
-                            alert_loop = self._get_event_loop()
-                            asyncio.run_coroutine_threadsafe(
-                                self.alert_service.check_alerts(symbol, price),
-                                alert_loop,
-                            )
-                        except Exception as e:
-                            print(f"Error checking alerts: {e}")
-                elif "c" in data and "s" in data:
-                    # Direct ticker format
-                    symbol = data["s"]
-                    price = float(data["c"])
-                    quantity = float(data.get("q", 0))
-                    timestamp = datetime.fromtimestamp(data.get("E", 0) / 1000)
-
-                    tick_data = {
-                        "timestamp": timestamp,
-                        "symbol": symbol,
-                        "price": price,
-                        "quantity": quantity,
-                    }
-
-                    # Store data - call sync method directly from thread
-                    try:
-                        self.data_service._store_tick_sync(tick_data)
-                        print(f"✓ Stored tick for {symbol} (direct format)")
-                    except Exception as e:
-                        print(f"✗ Error storing tick for {symbol} in thread: {e}")
-                        import traceback
-
-                        traceback.print_exc()
-
-                    with self.lock:
-                        self.latest_data[symbol] = {
-                            "timestamp": timestamp.isoformat(),
-                            "symbol": symbol,
-                            "price": price,
-                            "quantity": quantity,
-                        }
-
-                    asyncio.run_coroutine_threadsafe(
-                        self.alert_service.check_alerts(symbol, price), loop
-                    )
-
+                async with websockets.connect(url) as ws:
+                    self.ws = ws
+                    self._parse = self._parse_first
+                    print("Binance WebSocket connection opened successfully")
+                    self._ready.set()
+                    print(f"Subscribed symbols: {list(self.subscribed_symbols)}")
+                    # Reset reconnect attempts on successful connection
+                    self._reconnect_attempts = 0
+                    if self.subscribed_symbols:
+                        self._subscribe(list(self.subscribed_symbols))
+
+                    while True:
+                        # Take text frames as raw bytes: msgspec parses UTF-8
+                        # directly, so decoding to str first is wasted work.
+                        # Raises ConnectionClosed when the connection ends
+                        message = await ws.recv(decode=False)
+                        await self._handle_message(message)
+            except asyncio.CancelledError:
+                raise
+            except websockets.ConnectionClosed as e:
+                print(
+                    f"Binance WebSocket connection closed (code: {e.code}, reason: {e.reason})"
+                )
             except Exception as e:
-                print(f"Error processing WebSocket message: {e}")
-
-        def on_error(ws, error):
-            print(f"WebSocket error: {error}")
+                print(f"WebSocket error: {e}")
+                traceback.print_exc()
+            finally:
+                self.ws = None
 
-        def on_close(ws, close_status_code, close_msg):
-            print(
-                f"Binance WebSocket connection closed (code: {close_status_code}, reason: {close_msg})"
-            )
             if self.running:
-                # Reconnect with exponential backoff
-                import time
-                import random
-
                 # Exponential backoff: start with 2 seconds, max 30 seconds
                 reconnect_delay = min(2 * (2 ** min(self._reconnect_attempts, 4)), 30)
                 # Add jitter to prevent thundering herd
@@ -203,73 +315,97 @@ class WebSocketService:
                 print(
                     f"Reconnecting to Binance WebSocket in {delay:.1f} seconds (attempt {self._reconnect_attempts})..."
                 )
-                time.sleep(delay)
-                if self.running:  # Check again before reconnecting
-                    self._reconnect_attempts = 0  # Reset on successful reconnect
-                    self._run_websocket()
-
-        def on_open(ws):
-            print("Binance WebSocket connection opened successfully")
-            print(f"Subscribed symbols: {list(self.subscribed_symbols)}")
-            # Reset reconnect attempts on successful connection
-            self._reconnect_attempts = 0
-            if self.subscribed_symbols:
-                self._subscribe(list(self.subscribed_symbols))
-
-        # Connect to Binance WebSocket
-        # Use combined stream for multiple symbols
-        if self.subscribed_symbols:
-            streams = [f"{s.lower()}@ticker" for s in self.subscribed_symbols]
-            # Binance combined stream format: stream1/stream2/stream3
-            stream_names = "/".join(streams)
-            ws_url = f"wss://stream.binance.com:9443/stream?streams={stream_names}"
-            print(f"Connecting to Binance WebSocket: {ws_url}")
-            print(f"Streams: {streams}")
-        else:
-            ws_url = "wss://stream.binance.com:9443/ws"
-            print(f"Connecting to Binance WebSocket: {ws_url} (no symbols subscribed)")
-
-        self.ws = websocket.WebSocketApp(
-            ws_url,
-            on_message=on_message,
-            on_error=on_error,
-            on_close=on_close,
-            on_open=on_open,
-        )
-
-        print("Starting Binance WebSocket...")
+                await asyncio.sleep(delay)
+
+    def _parse_first(self, message: bytes):
+        """Parse a frame of either format, switching to the matching parser
+        once a ticker frame shows which one this connection sends"""
+        data = _message_decoder.decode(message)
+        if data.stream is not None and data.data is not None:
+            # Combined stream format
+            self._parse = _parse_combined
+            return data.data
+        if data.c is not None and data.s is not None:
+            # Direct ticker format
+            self._parse = _parse_direct
+            return data
+        return None
+
+    async def _handle_message(self, message: bytes):
+        """Parse one Binance frame and fan the tick out"""
         try:
-            self.ws.run_forever()
-        except Exception as e:
-            print(f"Fatal error in WebSocket run_forever: {e}")
-            import traceback
-
-            traceback.print_exc()
-            if self.running:
-                import time
-
-                time.sleep(5)
-                self._run_websocket()
+            try:
+                ticker = self._parse(message)
+                if (ticker is None or ticker.s is None) and self._parse in (_parse_combined, _parse_direct):
+                    # Not the expected format (e.g. a control frame): re-detect
+                    ticker = self._parse_first(message)
+            except msgspec.DecodeError as e:
+                print(f"Invalid message from Binance WebSocket: {e}")
+                return
+
+            if DEBUG:
+                print(f"Received Binance message: {str(ticker)[:200]}")
+
+            if ticker is None or ticker.c is None or ticker.s is None:
+                return
+
+            symbol = self._symbol_intern.get(ticker.s)
+            if symbol is None:
+                symbol = self._symbol_intern.setdefault(ticker.s, sys.intern(ticker.s))
+            price = ticker.c  # Last price
+            quantity = ticker.q  # Last quantity
+            ts_ms = ticker.E
+            tick = Tick(datetime.fromtimestamp(ts_ms / 1000), symbol, price, quantity)
+
+            i = self._sym_index.get(symbol)
+            if i is None:
+                i = self._add_symbol(symbol)
+                print(f"Received data for {symbol}: price={price}, qty={quantity}")
+
+            # Queue the tick - the flusher thread writes it in batches
+            self._tick_queue.append(tick)
+            self._tick_event.set()
+
+            # Update latest data
+            self._prices[i] = price
+            self._quantities[i] = quantity
+            self._timestamps[i] = ts_ms
+            self._prices_dirty = True
+            self._publish(tick)
 
-    def _get_event_loop(self):
-        """Get or create event loop for current thread"""
-        try:
-            return asyncio.get_event_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            return loop
+        except Exception as e:
+            print(f"Error processing WebSocket message: {e}")
 
     async def get_latest_data(self) -> Optional[Dict]:
         """Get latest data for WebSocket streaming"""
         try:
-            with self.lock:
-                if self.latest_data:
-                    return {
-                        "type": "tick_update",
-                        "data": list(self.latest_data.values()),
-                    }
+            n = len(self._symbols)
+            if n:
+                return {
+                    "type": "tick_update",
+                    "data": [
+                        {
+                            "timestamp": datetime.fromtimestamp(ts / 1000),
+                            "symbol": symbol,
+                            "price": price,
+                            "quantity": quantity,
+                        }
+                        for symbol, price, quantity, ts in zip(
+                            self._symbols,
+                            self._prices[:n].tolist(),
+                            self._quantities[:n].tolist(),
+                            self._timestamps[:n].tolist(),
+                        )
+                    ],
+                }
             return None
         except Exception as e:
             print(f"Error in get_latest_data: {e}")
             return None
+
+    async def get_latest_data_bytes(self) -> Optional[bytes]:
+        """Get latest data for WebSocket streaming, already encoded as JSON bytes"""
+        data = await self.get_latest_data()
+        if data is None:
+            return None
+        return orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY)